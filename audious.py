@@ -5,11 +5,33 @@ import lib as audiouslib
 
 
 def main():
-    """Main entry point. Handle an argument parser and the different options."""
+    """Main entry point. Handle an argument parser and the different options. The arguments are parsed first, so that
+    nothing else is loaded when only the help is asked for.
+    """
+    args = get_parser().parse_args()
     display = audiouslib.display.Display()
-    preferences = audiouslib.preferences.Preferences(display)
-    collection = audiouslib.collection.Collection(display, preferences)
 
+    # Option: select the output format and hide the noise, unless it is done by the daemon
+    if not args.client:
+        display.set_format(args.format)
+        display.set_quiet(args.quiet)
+
+    # Option: profile the phases of the program and write a report at exit
+    if args.profile is not None:
+        audiouslib.profiler.profiler.enable(args.profile_functions)
+    try:
+        run(args, display)
+    finally:
+        display.flush()
+        if args.profile is not None:
+            audiouslib.profiler.profiler.report(args.profile)
+
+
+def get_parser():
+    """Get the argument parser of the different options and actions.
+
+    :return argparse.ArgumentParser parser: the argument parser.
+    """
     parser = argparse.ArgumentParser(allow_abbrev=False)
     parser.add_argument('-e', '--export', action='store_true',
                         help='Export the playlists in FLAC or in MP3')
@@ -17,29 +39,96 @@ def main():
                         help='Pick the albums from the music collection that are not in the playlists')
     parser.add_argument('-s', '--stats', action='store_true',
                         help='Provide statistics of the music collection and the playlists')
-    args = parser.parse_args()
-
-    # Action: pick not listened albums
-    if args.pick:
-        display.show_step('Picking albums to listen...')
-        picker = audiouslib.picker.Picker(display, preferences, collection)
-        picker.init()
-        picker.pick_albums()
-        display.show_step('Picking albums to listen: done!')
-    # Action: provide music collection statistics
-    elif args.stats:
-        display.show_step('Providing statistics of the music collection...')
-        stats = audiouslib.statistics.Statistics(display, preferences, collection)
-        stats.init()
-        stats.compute()
-        display.show_step('Providing statistics of the music collection: done!')
-    # Action: export playlists
-    elif args.export:
-        display.show_step('Exporting the playlists...')
-        exporter = audiouslib.exporter.Exporter(display, preferences, collection)
-        exporter.init()
-        exporter.export()
-        display.show_step('Exporting the playlists: done!')
+    parser.add_argument('--sanitize', action='store_true',
+                        help='Report the songs of the playlists that are not in the music collection')
+    parser.add_argument('--sanitize-output', metavar='DIR',
+                        help='Also write the sanitized playlists, without the missing songs, in a directory')
+    parser.add_argument('--verify', action='store_true',
+                        help='Decode all the songs of the music collection to find the corrupted ones')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='Find the songs with identical audio across all the categories of the music collection')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Keep the music collection and the playlists in memory and answer the queries of the '
+                             'clients')
+    parser.add_argument('--client', action='store_true',
+                        help='Send the actions to the daemon instead of running them')
+    parser.add_argument('--full-rescan', action='store_true',
+                        help='Rescan all the directories instead of only the ones that changed since the last run')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help='Number of songs converted at the same time during an MP3 exportation (0 for all the '
+                             'CPUs)')
+    parser.add_argument('--sync', action='store_true',
+                        help='Update a previous exportation by only exporting the songs that are new or that changed')
+    parser.add_argument('--format', choices=('text', 'json', 'ndjson'), default='text',
+                        help='Format of the output: colored text, or structured records in a JSON array or in JSON '
+                             'lines, the other messages being written on the standard error')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='Hide the steps, the warnings and the progress')
+    parser.add_argument('--profile', nargs='?', const='audious-profile.json', metavar='PATH',
+                        help='Write a report of the time spent in each phase in JSON (by default in '
+                             '\'audious-profile.json\')')
+    parser.add_argument('--profile-functions', type=int, default=0, metavar='N',
+                        help='Also profile the function calls and add the N hottest functions to the report')
+    return parser
+
+
+def run(args, display):
+    """Handle the different options and actions. The Preferences are only loaded, and the music collection only
+    scanned, when an action needs them.
+
+    :param argparse.Namespace args: the parsed arguments.
+    :param Display display: the Display object.
+    """
+    actions = [action for action, selected in (('pick', args.pick), ('stats', args.stats),
+                                               ('sanitize', args.sanitize or args.sanitize_output is not None),
+                                               ('verify', args.verify), ('duplicates', args.duplicates),
+                                               ('export', args.export)) if selected]
+    if not actions and not args.daemon and not args.full_rescan:
+        return
+    preferences = audiouslib.preferences.Preferences(display)
+
+    # Option: synchronize the exportation with a previous one
+    if args.sync:
+        preferences.set_exportation_sync(True)
+
+    # Option: override the number of encoders set in the Preferences
+    if args.jobs is not None:
+        preferences.set_performance_encoders(args.jobs)
+
+    # Option: write the sanitized playlists
+    if args.sanitize_output is not None:
+        preferences.set_sanitization_path(args.sanitize_output)
+
+    # Option: forget the previous scans
+    if args.full_rescan:
+        audiouslib.walker.Walker(display, preferences).clear()
+
+    # Action: keep the index in memory and answer the queries of the clients
+    if args.daemon:
+        display.show_step('Starting the daemon...')
+        daemon = audiouslib.daemon.Daemon(display, preferences,
+                                          audiouslib.collection.Collection(display, preferences))
+        daemon.init()
+        daemon.serve()
+        return
+    if not actions:
+        return
+
+    # Option: send the actions to the daemon
+    if args.client:
+        if not set(actions) <= {'pick', 'stats'}:
+            display.show_error('Only the pick and statistics actions can be sent to the daemon.')
+            sys.exit(1)
+        client = audiouslib.daemon.Client(display, preferences)
+        client.init()
+        sys.exit(client.query(actions, args.format, args.quiet))
+
+    # Actions: pick not listened albums, provide music collection statistics, sanitize playlists, verify the music
+    # collection, find its duplicates and export playlists, in this order, over a single scan of the music collection
+    # and of the playlists
+    runner = audiouslib.runner.Runner(display, preferences, audiouslib.collection.Collection(display, preferences),
+                                      audiouslib.playlists.Playlists(display, preferences))
+    runner.run(actions)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import pathlib
+import random
+import struct
+
+
+class Generator(object):
+    def __init__(self, root, songs, songs_per_album=10, albums_per_artist=5, playlists=10, mp3_ratio=0.05, seed=0):
+        """Initialize the Generator object internally.
+
+        :param str root: the directory where the synthetic music collection is generated.
+        :param int songs: the approximate number of songs to generate.
+        :param int songs_per_album: the number of songs in each album.
+        :param int albums_per_artist: the number of albums of each artist.
+        :param int playlists: the number of playlists to generate.
+        :param float mp3_ratio: the ratio of songs generated in MP3 instead of FLAC.
+        :param int seed: the seed of the random generator, so that collections can be generated again identically.
+        """
+        self.__root = pathlib.Path(root).resolve()
+        self.__songs = songs
+        self.__songs_per_album = songs_per_album
+        self.__albums_per_artist = albums_per_artist
+        self.__playlists = playlists
+        self.__mp3_ratio = mp3_ratio
+        self.__random = random.Random(seed)
+
+        self.__categories = {'artists': 'Artists/', 'soundtracks': 'Soundtracks/'}
+        self.__soundtracks_ratio = 0.1
+        self.__playlists_ratio = 0.2
+        self.__sample_rate = 44100
+
+    def generate(self):
+        """Generate the synthetic music collection: the songs of each category, the playlists, an empty exportation
+        directory and the Preferences pointing to all of them.
+
+        :return pathlib.Path self.__root: the directory where the synthetic music collection was generated.
+        """
+        collection = self.__root / 'collection'
+        songs = []
+
+        total_soundtracks = int(self.__songs * self.__soundtracks_ratio)
+        for category, total in (('artists', self.__songs - total_soundtracks), ('soundtracks', total_soundtracks)):
+            songs.extend(self.__generate_category(collection, self.__categories[category], total))
+
+        self.__generate_playlists(collection / 'Playlists', songs)
+        (self.__root / 'exportation').mkdir(parents=True, exist_ok=True)
+        self.__generate_preferences()
+        return self.__root
+
+    def __generate_category(self, collection, category, total):
+        """Generate the songs of a music collection category, grouped by artist and album.
+
+        :param pathlib.Path collection: the root of the music collection.
+        :param str category: the directory of the category.
+        :param int total: the number of songs to generate.
+        :return list songs: the paths of the songs, relative to the music collection.
+        """
+        songs = []
+        songs_per_artist = self.__songs_per_album * self.__albums_per_artist
+        for cnt in range(total):
+            artist = cnt // songs_per_artist
+            album = (cnt % songs_per_artist) // self.__songs_per_album
+            number = cnt % self.__songs_per_album + 1
+            extension = 'mp3' if self.__random.random() < self.__mp3_ratio else 'flac'
+
+            song = '{}Artist {:05d}/Album {:02d}/{:02d} - Song.{}'.format(category, artist, album, number, extension)
+            path = collection / song
+            path.parent.mkdir(parents=True, exist_ok=True)
+            duration = self.__random.uniform(60, 600)
+            tags = {'TITLE': 'Song {:02d}'.format(number), 'ARTIST': 'Artist {:05d}'.format(artist),
+                    'ALBUMARTIST': 'Artist {:05d}'.format(artist), 'ALBUM': 'Album {:02d}'.format(album),
+                    'DATE': str(self.__random.randint(1950, 2020)), 'GENRE': self.__random.choice(['Rock', 'Jazz'])}
+            if extension == 'flac':
+                path.write_bytes(self.__get_flac(duration, tags))
+            else:
+                path.write_bytes(self.__get_mp3(tags))
+            songs.append(song)
+        return songs
+
+    def __get_flac(self, duration, tags):
+        """Get the content of a tiny but valid FLAC file: a STREAMINFO block giving the duration, a VORBIS_COMMENT block
+        with the tags and a few bytes of audio frames.
+
+        :param float duration: the duration of the song in seconds.
+        :param dict tags: the tags of the song.
+        :return bytes flac: the content of the file.
+        """
+        channels, bits_per_sample = 2, 16
+        samples = int(duration * self.__sample_rate)
+        streaminfo = struct.pack('>HH', 4096, 4096) + bytes(6)
+        streaminfo += ((self.__sample_rate << 44) | ((channels - 1) << 41) | ((bits_per_sample - 1) << 36) |
+                       samples).to_bytes(8, 'big')
+        streaminfo += bytes(16)
+
+        vendor = b'Audious'
+        comments = [('{}={}'.format(key, value)).encode() for key, value in tags.items()]
+        vorbis_comment = struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', len(comments))
+        for comment in comments:
+            vorbis_comment += struct.pack('<I', len(comment)) + comment
+
+        flac = b'fLaC'
+        flac += bytes([0]) + len(streaminfo).to_bytes(3, 'big') + streaminfo
+        flac += bytes([0x80 | 4]) + len(vorbis_comment).to_bytes(3, 'big') + vorbis_comment
+        flac += bytes([0xff, 0xf8]) + bytes(self.__random.getrandbits(8) for _ in range(62))
+        return flac
+
+    def __get_mp3(self, tags):
+        """Get the content of a tiny but valid MP3 file: an ID3v2.3 header with the tags and a few silent MPEG-1 Layer
+        III frames.
+
+        :param dict tags: the tags of the song.
+        :return bytes mp3: the content of the file.
+        """
+        frames = b''
+        for frame_id, key in (('TIT2', 'TITLE'), ('TPE1', 'ARTIST'), ('TPE2', 'ALBUMARTIST'), ('TALB', 'ALBUM')):
+            value = b'\x00' + tags[key].encode('latin-1')
+            frames += frame_id.encode() + struct.pack('>I', len(value)) + b'\x00\x00' + value
+        size = len(frames)
+        synchsafe = bytes([(size >> 21) & 0x7f, (size >> 14) & 0x7f, (size >> 7) & 0x7f, size & 0x7f])
+
+        # 128 kbps, 44.1 kHz, no padding: 417 bytes per frame
+        audio = (b'\xff\xfb\x90\x64' + bytes(413)) * 8
+        return b'ID3\x03\x00\x00' + synchsafe + frames + audio
+
+    def __generate_playlists(self, playlists, songs):
+        """Generate M3U playlists, each containing a random selection of songs.
+
+        :param pathlib.Path playlists: the directory of the playlists.
+        :param list songs: the paths of the songs, relative to the music collection.
+        """
+        playlists.mkdir(parents=True, exist_ok=True)
+        total = max(1, int(len(songs) * self.__playlists_ratio / self.__playlists))
+        for cnt in range(self.__playlists):
+            selection = self.__random.sample(songs, min(total, len(songs)))
+            (playlists / 'Playlist {:02d}.m3u'.format(cnt)).write_text('\n'.join(selection) + '\n', encoding='utf8')
+
+    def __generate_preferences(self):
+        """Generate the Preferences of the synthetic music collection, located under a 'preferences/' directory so that
+        Audious can be run from the generated directory.
+        """
+        preferences = {
+            'collection': {'root': str(self.__root / 'collection') + '/', 'playlists': 'Playlists/',
+                           'music': self.__categories},
+            'exportation': {'root': str(self.__root / 'exportation') + '/', 'playlists': 'Playlists/',
+                            'format': 'flac', 'sync': True},
+        }
+        (self.__root / 'preferences').mkdir(parents=True, exist_ok=True)
+        with open(self.__root / 'preferences' / 'preferences.json', 'w') as preferences_file:
+            json.dump(preferences, preferences_file, indent=2)
+
+
+def main():
+    """Main entry point. Generate a synthetic music collection."""
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('root', help='Directory where the synthetic music collection is generated')
+    parser.add_argument('-n', '--songs', type=int, default=1000, help='Number of songs to generate')
+    parser.add_argument('--songs-per-album', type=int, default=10, help='Number of songs in each album')
+    parser.add_argument('--albums-per-artist', type=int, default=5, help='Number of albums of each artist')
+    parser.add_argument('--playlists', type=int, default=10, help='Number of playlists to generate')
+    parser.add_argument('--mp3-ratio', type=float, default=0.05, help='Ratio of songs generated in MP3')
+    args = parser.parse_args()
+
+    generator = Generator(args.root, args.songs, args.songs_per_album, args.albums_per_artist, args.playlists,
+                          args.mp3_ratio)
+    print(generator.generate())
+
+
+if __name__ == '__main__':
+    main()
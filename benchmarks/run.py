@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import pathlib
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from benchmarks import generator  # noqa: E402
+
+
+class Benchmark(object):
+    def __init__(self, scales, actions, repeat, output):
+        """Initialize the Benchmark object internally.
+
+        :param list scales: the numbers of songs of the synthetic music collections.
+        :param list actions: the actions to benchmark (e.g. pick, stats, export).
+        :param int repeat: the number of warm runs following the cold run of each action.
+        :param str output: the path of the JSON file where the results are recorded.
+        """
+        self.__scales = scales
+        self.__actions = actions
+        self.__repeat = repeat
+        self.__output = output
+        self.__script = pathlib.Path(__file__).resolve()
+
+    def run(self):
+        """Run the benchmark. For each scale, generate a synthetic music collection in a temporary directory, then run
+        each action in a fresh process, once with empty caches (cold) and then again with the caches filled (warm).
+        Record the time and the peak memory of each run, along with the commit, so that the results can be compared
+        between commits.
+        """
+        results = {'commit': self.__get_commit(), 'python': platform.python_version(), 'date': time.time(),
+                   'results': []}
+
+        for scale in self.__scales:
+            with tempfile.TemporaryDirectory(prefix='audious-benchmark-') as root:
+                start = time.perf_counter()
+                generator.Generator(root, scale).generate()
+                print('Generated {:,} songs in {:.2f}s'.format(scale, time.perf_counter() - start))
+
+                for action in self.__actions:
+                    self.__reset(root)
+                    for run in range(self.__repeat + 1):
+                        result = self.__run_action(root, action)
+                        result.update({'scale': scale, 'action': action, 'cache': 'warm' if run else 'cold'})
+                        results['results'].append(result)
+                        print('  {:<7} {:<5} {:>9.3f}s {:>9.1f} MB'.format(action, result['cache'], result['time'],
+                                                                          result['memory'] / (1024 * 1024)))
+
+        if self.__output:
+            with open(self.__output, 'w') as output_file:
+                json.dump(results, output_file, indent=2)
+
+    def __reset(self, root):
+        """Remove the caches and the exported songs, so that the next run is a cold run.
+
+        :param str root: the directory of the synthetic music collection.
+        """
+        shutil.rmtree(pathlib.Path(root, 'cache'), ignore_errors=True)
+        shutil.rmtree(pathlib.Path(root, 'exportation'), ignore_errors=True)
+        pathlib.Path(root, 'exportation').mkdir()
+
+    def __run_action(self, root, action):
+        """Run an action in a fresh process, from the directory of the synthetic music collection.
+
+        :param str root: the directory of the synthetic music collection.
+        :param str action: the action to run.
+        :return dict result: the time and the peak memory of the run.
+        """
+        with tempfile.NamedTemporaryFile(suffix='.json') as result_file:
+            subprocess.run([sys.executable, str(self.__script), '--worker', action, '--result', result_file.name],
+                           cwd=root, input=b'y\n' * 10, stdout=subprocess.DEVNULL, check=True)
+            return json.load(result_file)
+
+    def __get_commit(self):
+        """Get the commit being benchmarked.
+
+        :return str commit: the commit hash, or None if not available.
+        """
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=self.__script.parent, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+
+def work(action, result):
+    """Run an action of Audious in the current process and record its time and peak memory. Only the action itself is
+    timed, not the startup of the process.
+
+    :param str action: the action to run (pick, stats or export).
+    :param str result: the path of the JSON file where the result is recorded.
+    """
+    import lib as audiouslib
+
+    display = audiouslib.display.Display()
+    preferences = audiouslib.preferences.Preferences(display)
+    collection = audiouslib.collection.Collection(display, preferences)
+
+    start = time.perf_counter()
+    if action == 'pick':
+        picker = audiouslib.picker.Picker(display, preferences, collection)
+        picker.init()
+        picker.pick_albums()
+    elif action == 'stats':
+        stats = audiouslib.statistics.Statistics(display, preferences, collection)
+        stats.init()
+        stats.compute()
+    elif action == 'export':
+        exporter = audiouslib.exporter.Exporter(display, preferences, collection)
+        exporter.init()
+        exporter.export()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        memory *= 1024
+
+    with open(result, 'w') as result_file:
+        json.dump({'time': elapsed, 'memory': memory}, result_file)
+
+
+def compare(baseline, candidate):
+    """Compare the results of two benchmarks, for instance recorded on two different commits.
+
+    :param str baseline: the path of the results of the baseline.
+    :param str candidate: the path of the results of the candidate.
+    """
+    with open(baseline, 'r') as baseline_file, open(candidate, 'r') as candidate_file:
+        baseline_results, candidate_results = json.load(baseline_file), json.load(candidate_file)
+
+    baseline_index = {(r['scale'], r['action'], r['cache']): r for r in baseline_results['results']}
+    print('{:>8} {:<7} {:<5} {:>10} {:>10} {:>8} {:>10}'.format('songs', 'action', 'cache', 'baseline', 'candidate',
+                                                             'time', 'memory'))
+    for result in candidate_results['results']:
+        key = (result['scale'], result['action'], result['cache'])
+        if key not in baseline_index:
+            continue
+        reference = baseline_index[key]
+        print('{:>8,} {:<7} {:<5} {:>9.3f}s {:>9.3f}s {:>+7.1f}% {:>+9.1f}%'
+              .format(key[0], key[1], key[2], reference['time'], result['time'],
+                      (result['time'] / reference['time'] - 1) * 100,
+                      (result['memory'] / reference['memory'] - 1) * 100))
+
+
+def main():
+    """Main entry point. Handle an argument parser and the different modes of the benchmark."""
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('-n', '--scales', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Numbers of songs of the synthetic music collections')
+    parser.add_argument('-a', '--actions', nargs='+', default=['pick', 'stats', 'export'],
+                        choices=['pick', 'stats', 'export'], help='Actions to benchmark')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='Number of warm runs after the cold run')
+    parser.add_argument('-o', '--output', help='JSON file where the results are recorded')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help='Compare the results of two benchmarks')
+    parser.add_argument('--worker', choices=['pick', 'stats', 'export'], help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        work(args.worker, args.result)
+    elif args.compare:
+        compare(*args.compare)
+    else:
+        Benchmark(args.scales, args.actions, args.repeat, args.output).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import pathlib
+import platform
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from benchmarks import generator  # noqa: E402
+
+
+class Startup(object):
+    def __init__(self, runs, budget, output):
+        """Initialize the Startup object internally.
+
+        :param int runs: the number of runs of each scenario.
+        :param float budget: the maximum time in milliseconds that Audious may add to the startup of the interpreter.
+        :param str output: the path of the JSON file where the results are recorded.
+        """
+        self.__runs = runs
+        self.__budget = budget
+        self.__output = output
+        self.__audious = pathlib.Path(__file__).resolve().parent.parent / 'audious.py'
+        self.__scenarios = {'help': ['--help'], 'client': ['-p', '--client', '--format', 'ndjson', '--quiet']}
+        self.__songs = 1000
+        self.__daemon_timeout = 60.
+
+    def run(self):
+        """Run the benchmark. Each scenario is run several times in fresh processes, as the dashboard does: the help,
+        and a pick query sent to a daemon running over a synthetic music collection. The median time of each scenario
+        is compared with the median time of the interpreter alone, and the difference must stay within the budget.
+        Record the results along with the commit, so that they can be tracked between commits.
+
+        :return bool within_budget: True if all the scenarios are within the budget.
+        """
+        results = {'commit': self.__get_commit(), 'python': platform.python_version(), 'date': time.time(),
+                   'budget': self.__budget, 'results': []}
+
+        with tempfile.TemporaryDirectory(prefix='audious-benchmark-') as root:
+            generator.Generator(root, self.__songs).generate()
+            daemon = self.__start_daemon(root)
+            try:
+                interpreter = self.__time(root, [sys.executable, '-c', 'pass'])
+                print('  {:<12} {:>9.1f} ms'.format('interpreter', interpreter))
+                for scenario, arguments in self.__scenarios.items():
+                    median = self.__time(root, [sys.executable, str(self.__audious)] + arguments)
+                    overhead = median - interpreter
+                    results['results'].append({'scenario': scenario, 'time': median, 'overhead': overhead,
+                                               'within_budget': overhead <= self.__budget})
+                    print('  {:<12} {:>9.1f} ms {:>+9.1f} ms {}'.format(scenario, median, overhead,
+                                                                        'ok' if overhead <= self.__budget else
+                                                                        'over budget'))
+            finally:
+                daemon.send_signal(signal.SIGTERM)
+                daemon.wait()
+
+        if self.__output:
+            with open(self.__output, 'w') as output_file:
+                json.dump(results, output_file, indent=2)
+        return all(result['within_budget'] for result in results['results'])
+
+    def __start_daemon(self, root):
+        """Start a daemon over the synthetic music collection and wait until it answers, so that its index is built
+        and its answer to the pick query is kept before the runs are timed.
+
+        :param str root: the directory of the synthetic music collection.
+        :return subprocess.Popen daemon: the process of the daemon.
+        """
+        daemon = subprocess.Popen([sys.executable, str(self.__audious), '--daemon'], cwd=root,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + self.__daemon_timeout
+        while subprocess.run([sys.executable, str(self.__audious)] + self.__scenarios['client'], cwd=root,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode != 0:
+            if daemon.poll() is not None or time.monotonic() > deadline:
+                daemon.kill()
+                sys.exit('The daemon could not be started.')
+            time.sleep(0.1)
+        return daemon
+
+    def __time(self, root, command):
+        """Run a command several times in fresh processes and get its median time.
+
+        :param str root: the directory of the synthetic music collection.
+        :param list command: the command to run.
+        :return float median: the median time in milliseconds.
+        """
+        times = []
+        for _ in range(self.__runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
+
+    def __get_commit(self):
+        """Get the commit being benchmarked.
+
+        :return str commit: the commit hash, or None if not available.
+        """
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=self.__audious.parent, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+
+def main():
+    """Main entry point. Handle an argument parser and leave with an error status if the budget is exceeded."""
+    parser = argparse.ArgumentParser(allow_abbrev=False)
+    parser.add_argument('-r', '--runs', type=int, default=20, help='Number of runs of each scenario')
+    parser.add_argument('-b', '--budget', type=float, default=75.,
+                        help='Maximum time in milliseconds that Audious may add to the startup of the interpreter')
+    parser.add_argument('-o', '--output', help='JSON file where the results are recorded')
+    args = parser.parse_args()
+    sys.exit(0 if Startup(args.runs, args.budget, args.output).run() else 1)
+
+
+if __name__ == '__main__':
+    main()
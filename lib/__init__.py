@@ -1,8 +1,21 @@
 #!/usr/bin/env python3
-from lib import collection
-from lib import display
-from lib import exporter
-from lib import picker
-from lib import playlists
-from lib import preferences
-from lib import statistics
+import importlib
+
+# The modules are imported on first use (e.g. 'audiouslib.exporter'), so that a run only loads the modules, and their
+# dependencies, that its actions need
+__all__ = ['cache', 'collection', 'columns', 'copier', 'daemon', 'deduplicator', 'display', 'estimator', 'exporter',
+           'manifest', 'metadata', 'picker', 'pipeline', 'playlists', 'preferences', 'profiler', 'progress', 'runner',
+           'sanitizer', 'statistics', 'transcoder', 'verifier', 'walker']
+
+
+def __getattr__(name):
+    """Import a module of the package the first time it is used. Once imported, the module is an attribute of the
+    package, so that this function is not called again for it.
+
+    :param str name: the name of the module.
+    :return module module: the imported module.
+    :raise AttributeError: if the package has no such module.
+    """
+    if name not in __all__:
+        raise AttributeError('module \'{}\' has no attribute \'{}\''.format(__name__, name))
+    return importlib.import_module('{}.{}'.format(__name__, name))
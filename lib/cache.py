@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import os
+import sqlite3
+
+
+def open_cache(preferences, name, version, tables):
+    """Open a cache stored in the cache directory and create its tables if necessary. If the cache was created by a
+    different version of Audious, drop its tables and start again from scratch.
+
+    :param Preferences preferences: the Preferences, giving the cache directory.
+    :param str name: the name of the cache file (e.g. 'metadata.db').
+    :param int version: the version of the cache, to increase whenever its tables change.
+    :param dict tables: the columns and constraints of each table (e.g. '(path TEXT PRIMARY KEY, size INTEGER)'),
+     indexed by table name.
+    :return sqlite3.Connection connection: the connection to the cache.
+    """
+    connection = sqlite3.connect(os.path.join(preferences.get_cache_path(), name))
+    if connection.execute('PRAGMA user_version').fetchone()[0] != version:
+        for table in tables:
+            connection.execute('DROP TABLE IF EXISTS {}'.format(table))
+        connection.execute('PRAGMA user_version = {}'.format(version))
+    for table, definition in tables.items():
+        connection.execute('CREATE TABLE IF NOT EXISTS {} {}'.format(table, definition))
+    connection.commit()
+    return connection
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
+import collections
 import os
-import re
 import sys
+import lib as audiouslib
+
+
+Song = collections.namedtuple('Song', ['path', 'size', 'mtime'])
 
 
 class Collection(object):
@@ -9,9 +13,12 @@ class Collection(object):
         """Initialize the Collection object internally."""
         self.__display = display
         self.__prefs = preferences
+        self.__walker = audiouslib.walker.Walker(display, preferences)
 
         self.__collection_path_root = None
         self.__collection_paths_music_categories = None
+        self.__collection_model = None
+        self.__collection_songs = None
         self.__total_albums = 0
 
     def init(self):
@@ -21,6 +28,7 @@ class Collection(object):
         self.__collection_path_root = self.__prefs.get_collection_path_root()
         self.__collection_paths_music_categories = self.__prefs.get_collection_paths_music_categories()
         self.__check_total_music_categories()
+        self.__walker.init()
 
     def __check_total_music_categories(self):
         """Check the total of music categories. If none found, generate an error and leave the program."""
@@ -29,22 +37,77 @@ class Collection(object):
                                       'and try again.')
             sys.exit(0)
 
-    def get_category_albums(self, category_songs):
-        """Open a category in the music collection and get a list of all the albums contained in this category.
-        Handle macOS hidden files. Check the number of albums in the music category as well as in the music collection.
-        Increment the total.
+    def scan(self):
+        """Walk the whole music collection once and build a model of the music collection, where each category
+        contains its albums and each album contains its songs, along with their size and last modification time found
+        during the walk. Also index all the songs by their full path. The model is built only once and then reused by
+        all the actions. Select only .mp3 and .flac files and handle macOS hidden files.
 
-        :param list category_songs: list of songs contained in a music category.
-        :return list category_albums: list of albums contained in a music category.
+        :return dict self.__collection_model: the music collection model (category -> album -> list of songs).
+        """
+        if self.__collection_model is not None:
+            return self.__collection_model
+
+        self.__collection_model = {}
+        self.__collection_songs = {}
+
+        for category, category_path in self.__collection_paths_music_categories.items():
+            category_model = {}
+            for entry in self.__walker.walk(category_path, ('.flac', '.mp3')):
+                song = Song(entry.path, entry.size, entry.mtime)
+                self.__collection_songs[song.path] = song
+                if '.DS_Store' not in song.path:
+                    album = song.path.rsplit('/', 1)[0].replace(self.__collection_path_root, '')
+                    category_model.setdefault(album, []).append(song)
+            self.__collection_model[category] = category_model
+
+        return self.__collection_model
+
+    def refresh(self):
+        """Build again the music collection model, so that the changes made since the previous scan are taken into
+        account. Only the directories that changed since the previous scan are listed again.
+
+        :return bool changed: True if songs were added, removed or modified since the previous scan.
+        """
+        songs = self.__collection_songs
+        self.__collection_model = None
+        self.__total_albums = 0
+        self.scan()
+        return self.__collection_songs != songs
+
+    def get_song(self, path):
+        """Get a song of the music collection from the model. If the song is located outside of the music categories,
+        check it directly on the disk.
+
+        :param str path: full path of the song.
+        :return Song song: the song or None if the song was not found.
+        """
+        self.scan()
+        song = self.__collection_songs.get(path)
+        if song is None and not path.startswith(tuple(self.__collection_paths_music_categories.values())):
+            try:
+                with audiouslib.profiler.profiler.phase('stat'):
+                    stat = os.stat(path)
+                song = Song(path, stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                song = None
+        return song
+
+    def show_category_parsing(self, category):
+        """Show the music collection category that is being parsed.
+
+        :param str category: the music collection category name.
         """
-        category_albums = []
+        self.__display.show_validation('Parsing \'{}\' in the music collection'.format(category.title()))
 
-        for song in category_songs:
-            if '.DS_Store' not in song:
-                album = song.rsplit('/', 1)[0]
-                album = album.replace(self.__collection_path_root, '')
-                if album not in category_albums:
-                    category_albums.append(album)
+    def get_category_albums(self, category):
+        """Get a list of all the albums contained in a category of the music collection model. Check the number of
+        albums in the music category as well as in the music collection. Increment the total.
+
+        :param str category: the music collection category name.
+        :return list category_albums: list of albums contained in a music category.
+        """
+        category_albums = list(self.scan()[category])
 
         total_albums_category = len(category_albums)
         self.__check_total_albums_category(total_albums_category)
@@ -62,20 +125,15 @@ class Collection(object):
                                    '1 album was found in this category',
                                    'No albums were found in this category')
 
-    def get_category_songs(self, category, path):
-        """Open a category in the music collection and get a list of all the songs contained in this category. Select
-        only .mp3 and .flac files with a regex.
+    def get_category_songs(self, category):
+        """Get a list of all the songs contained in a category of the music collection model.
 
         :param str category: the music collection category name.
-        :param str path: the path where the music collection category is located.
         :return list category_songs: list of songs contained in a music category.
         """
-        self.__display.show_validation('Parsing \'{}\' in the music collection'.format(category.title()))
-        regex = re.compile(r'\.(flac)$|\.(mp3)$')
-
         category_songs = []
-        for path, dnames, fnames in os.walk(path):
-            category_songs.extend([os.path.join(path, x) for x in fnames if regex.search(x)])
+        for album_songs in self.scan()[category].values():
+            category_songs.extend(album_songs)
         return category_songs
 
     def check_total_albums_collection(self):
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+import array
+import collections
+
+
+class Columns(object):
+    def __init__(self):
+        """Initialize the Columns object internally. Each field of the songs is stored in its own typed array, one
+        item per song, rather than in one Python object per song. Text fields (e.g. genre, artist) are stored as codes
+        in a dictionary of their distinct values.
+        """
+        self.__columns = {'duration': array.array('d'), 'year': array.array('H'), 'bitrate': array.array('d'),
+                          'samplerate': array.array('I'), 'bitdepth': array.array('B'), 'size': array.array('Q'),
+                          'genre': array.array('I'), 'artist': array.array('I'), 'quality': array.array('B')}
+        self.__dictionaries = {'genre': {}, 'artist': {}}
+        self.__values = {'genre': [], 'artist': []}
+        self.__qualities = ('Unknown', 'CD quality', 'Hi-res')
+        self.__cd_bitdepth = 16
+        self.__cd_samplerate = 48000
+        self.__unknown = 'Unknown'
+
+    def __len__(self):
+        """Get the number of songs stored in the columns.
+
+        :return int length: the number of songs.
+        """
+        return len(self.__columns['size'])
+
+    def append(self, song, tag):
+        """Append a song and its metadata to the columns. Missing numbers are stored as 0 and missing texts as
+        'Unknown'. The quality of the song is derived once from its bit depth and sample rate: hi-res above 16 bits or
+        48 kHz, CD quality otherwise.
+
+        :param Song song: the song, as found in the music collection.
+        :param Tag tag: the metadata of the song.
+        """
+        columns = self.__columns
+        columns['duration'].append(tag.duration or 0.)
+        columns['year'].append(tag.year or 0)
+        columns['bitrate'].append(tag.bitrate or 0.)
+        columns['samplerate'].append(tag.samplerate or 0)
+        columns['bitdepth'].append(tag.bitdepth or 0)
+        columns['size'].append(song.size)
+        columns['genre'].append(self.__encode('genre', tag.genre))
+        columns['artist'].append(self.__encode('artist', tag.albumartist))
+
+        if not tag.bitdepth and not tag.samplerate:
+            quality = 0
+        elif tag.bitdepth > self.__cd_bitdepth or tag.samplerate > self.__cd_samplerate:
+            quality = 2
+        else:
+            quality = 1
+        columns['quality'].append(quality)
+
+    def __encode(self, name, value):
+        """Get the code of a text value in the dictionary of a column, adding the value if it is new.
+
+        :param str name: the name of the column (e.g. 'genre').
+        :param str value: the text value, or None if unknown.
+        :return int code: the code of the value.
+        """
+        dictionary = self.__dictionaries[name]
+        value = value.strip() if value and value.strip() else self.__unknown
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+            self.__values[name].append(value)
+        return code
+
+    def total(self, column, start=0, end=None):
+        """Get the total of a numeric column over a range of songs.
+
+        :param str column: the name of the column (e.g. 'duration', 'size').
+        :param int start: the index of the first song.
+        :param int end: the index after the last song, or None until the last song.
+        :return float total: the total of the column.
+        """
+        return sum(self.__columns[column][start:end])
+
+    def histogram(self, key):
+        """Count the songs in each group of a key.
+
+        :param str key: the key grouping the songs ('decade', 'genre', 'artist', 'quality', 'samplerate', 'bitdepth').
+        :return dict histogram: the number of songs, indexed by group label, from the largest group to the smallest.
+        """
+        counts = collections.Counter(self.__get_key(key))
+        return {self.__get_label(key, code): count for code, count in counts.most_common()}
+
+    def aggregate(self, column, key):
+        """Get the number of songs and the total of a numeric column in each group of a key. The totals of all the
+        groups are accumulated in a single pass over the columns.
+
+        :param str column: the name of the numeric column to sum (e.g. 'duration', 'size').
+        :param str key: the key grouping the songs ('decade', 'genre', 'artist', 'quality', 'samplerate', 'bitdepth').
+        :return dict aggregates: tuples of number of songs and total, indexed by group label, from the largest total to
+         the smallest.
+        """
+        keys = self.__get_key(key)
+        values = self.__columns[column]
+        counts = collections.Counter(keys)
+        totals = dict.fromkeys(counts, 0)
+        for code, value in zip(keys, values):
+            totals[code] += value
+
+        groups = sorted(totals, key=totals.get, reverse=True)
+        return {self.__get_label(key, code): (counts[code], totals[code]) for code in groups}
+
+    def __get_key(self, key):
+        """Get the column grouping the songs for a key. The decades are derived from the years on the fly.
+
+        :param str key: the key grouping the songs.
+        :return array.array codes: the code of the group of each song.
+        """
+        if key == 'decade':
+            return array.array('H', map((10).__rfloordiv__, self.__columns['year']))
+        return self.__columns[key]
+
+    def __get_label(self, key, code):
+        """Get the readable label of a group.
+
+        :param str key: the key grouping the songs.
+        :param int code: the code of the group.
+        :return str label: the label of the group (e.g. '1990s', 'Hi-res', '44100 Hz').
+        """
+        if key in self.__values:
+            return self.__values[key][code]
+        if key == 'quality':
+            return self.__qualities[code]
+        if code == 0:
+            return self.__unknown
+        if key == 'decade':
+            return '{}s'.format(code * 10)
+        if key == 'samplerate':
+            return '{} Hz'.format(code)
+        if key == 'bitdepth':
+            return '{} bits'.format(code)
+        return str(code)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import contextlib
+import errno
+import fcntl
+import os
+import shutil
+
+
+class Copier(object):
+    def __init__(self, display, preferences):
+        """Initialize the Copier object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__hardlinks = False
+        self.__ficlone = 0x40049409
+        self.__chunk_size = 64 * 1024 * 1024
+        self.__unsupported = (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP, errno.EPERM,
+                              errno.EBADF, errno.ENOTSOCK)
+        self.__supported = {'reflink': True, 'copy_file_range': hasattr(os, 'copy_file_range'),
+                            'sendfile': hasattr(os, 'sendfile')}
+
+    def init(self):
+        """Initialize the Copier object. Check in the Preferences if songs can be exported as hard links."""
+        self.__hardlinks = self.__prefs.get_exportation_hardlinks()
+
+    def copy(self, source, destination):
+        """Copy a song with the cheapest method available, while preserving the song OS metadata (e.g. date, last
+        modification, etc.). The methods are tried in the following order:
+          * A reflink, which shares the data with the original song until one of them is modified (e.g. Btrfs, XFS)
+          * A hard link, if enabled in the Preferences and if both paths are on the same file system
+          * A copy done by the kernel, without going through the user space (copy_file_range, then sendfile)
+          * A regular copy
+        A method that is not supported is not tried again for the next songs. Except for a hard link, the copy is
+        written in a temporary file first and then renamed, so that a previous copy that is a hard link to the song
+        (e.g. exported while hard links were enabled) is replaced instead of being written through.
+
+        :param str source: full path of the song to copy.
+        :param str destination: full path of the copy.
+        :raise shutil.SameFileError: if the copy would be the song itself.
+        """
+        if self.__hardlinks and self.__link(source, destination):
+            return
+        if os.path.exists(destination) and os.path.samefile(source, destination):
+            raise shutil.SameFileError('\'{}\' and \'{}\' are the same file'.format(source, destination))
+
+        destination_temporary = destination + '.tmp'
+        try:
+            with open(source, 'rb') as source_file, open(destination_temporary, 'wb') as destination_file:
+                if not self.__reflink(source_file, destination_file):
+                    size = os.fstat(source_file.fileno()).st_size
+                    if not self.__copy_kernel(source_file, destination_file, size):
+                        shutil.copyfileobj(source_file, destination_file, self.__chunk_size)
+            shutil.copystat(source, destination_temporary)
+            os.replace(destination_temporary, destination)
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(destination_temporary)
+            raise
+
+    def __link(self, source, destination):
+        """Create a hard link to a song if both paths are on the same file system.
+
+        :param str source: full path of the song to link.
+        :param str destination: full path of the link.
+        :return bool linked: True if the link was created.
+        """
+        try:
+            if os.path.lexists(destination):
+                os.unlink(destination)
+            os.link(source, destination)
+            return True
+        except OSError as e:
+            if e.errno in self.__unsupported or e.errno == errno.EMLINK:
+                return False
+            raise
+
+    def __reflink(self, source_file, destination_file):
+        """Create a reflink of a song, on the file systems supporting it.
+
+        :param file source_file: the song to copy, opened for reading.
+        :param file destination_file: the copy, opened for writing.
+        :return bool copied: True if the reflink was created.
+        """
+        if not self.__supported['reflink']:
+            return False
+        try:
+            fcntl.ioctl(destination_file.fileno(), self.__ficlone, source_file.fileno())
+            return True
+        except OSError as e:
+            if e.errno not in self.__unsupported:
+                raise
+            self.__supported['reflink'] = False
+            return False
+
+    def __copy_kernel(self, source_file, destination_file, size):
+        """Copy a song in the kernel, with copy_file_range if available or sendfile otherwise. A method that fails as
+        not supported, or that stops before the end of the song (e.g. on some virtual or network file systems), is not
+        tried again, and the copy starts again from scratch with the next method.
+
+        :param file source_file: the song to copy, opened for reading.
+        :param file destination_file: the copy, opened for writing.
+        :param int size: the size of the song.
+        :return bool copied: True if the song was copied.
+        """
+        for method in ('copy_file_range', 'sendfile'):
+            if not self.__supported[method]:
+                continue
+            try:
+                if self.__copy_kernel_method(method, source_file, destination_file, size):
+                    return True
+            except OSError as e:
+                if e.errno not in self.__unsupported:
+                    raise
+            self.__supported[method] = False
+            source_file.seek(0)
+            destination_file.seek(0)
+            destination_file.truncate()
+        return False
+
+    def __copy_kernel_method(self, method, source_file, destination_file, size):
+        """Copy a song in the kernel with a given method, chunk by chunk.
+
+        :param str method: the method to use, either 'copy_file_range' or 'sendfile'.
+        :param file source_file: the song to copy, opened for reading.
+        :param file destination_file: the copy, opened for writing.
+        :param int size: the size of the song.
+        :return bool copied: True if the whole song was copied.
+        """
+        source_fd, destination_fd = source_file.fileno(), destination_file.fileno()
+        offset = 0
+        while offset < size:
+            count = min(self.__chunk_size, size - offset)
+            if method == 'copy_file_range':
+                copied = os.copy_file_range(source_fd, destination_fd, count, offset, offset)
+            else:
+                copied = os.sendfile(destination_fd, source_fd, offset, count)
+            if copied == 0:
+                break
+            offset += copied
+        return offset == size
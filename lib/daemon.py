@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import contextlib
+import io
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+import lib as audiouslib
+
+
+class Daemon(object):
+    def __init__(self, display, preferences, collection):
+        """Initialize the Daemon object internally."""
+        self.__display = display
+        self.__prefs = preferences
+        self.__coll = collection
+        self.__play = audiouslib.playlists.Playlists(display, preferences)
+        self.__runner = audiouslib.runner.Runner(display, preferences, collection, self.__play)
+
+        self.__socket_path = None
+        self.__interval = None
+        self.__actions = ('pick', 'stats')
+        self.__answers = {}
+        self.__request_size_max = 64 * 1024
+        self.__timeout = 5.
+
+    def init(self):
+        """Initialize the Daemon object. Get the path of the socket and the interval between two checks of the changes
+        in the Preferences.
+        """
+        self.__socket_path = self.__prefs.get_daemon_socket()
+        self.__interval = self.__prefs.get_daemon_interval()
+        self.__coll.init()
+        self.__play.init()
+
+    def serve(self):
+        """Build the index of the music collection and of the playlists once, then answer the queries sent by the
+        clients on a Unix socket until interrupted. The directories and the playlists are checked again at a regular
+        interval, and only the ones whose last modification time changed are listed or parsed again. The answers are
+        kept until the index changes, so that repeated queries are answered right away. The daemon stops properly when
+        it is terminated (e.g. by a service manager).
+        """
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        server = self.__open_socket()
+        try:
+            self.__refresh()
+            self.__display.show_validation('Listening on \'{}\''.format(self.__socket_path))
+            last_refresh = time.monotonic()
+            while True:
+                remaining = max(0., last_refresh + self.__interval - time.monotonic())
+                readable, _, _ = select.select([server], [], [], remaining)
+                if readable:
+                    connection, _ = server.accept()
+                    with connection:
+                        self.__handle(connection)
+                if time.monotonic() - last_refresh >= self.__interval:
+                    self.__refresh()
+                    last_refresh = time.monotonic()
+        finally:
+            server.close()
+            os.remove(self.__socket_path)
+
+    def __open_socket(self):
+        """Open the Unix socket of the daemon. A socket left by a daemon that did not stop properly is removed, but if
+        another daemon is still answering on it, generate an error and leave the program.
+
+        :return socket.socket server: the listening socket.
+        """
+        if os.path.exists(self.__socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(self.__socket_path)
+                self.__display.show_error('A daemon is already running on \'{}\'.'.format(self.__socket_path))
+                sys.exit(1)
+            except ConnectionRefusedError:
+                os.remove(self.__socket_path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.__socket_path)
+        server.listen()
+        return server
+
+    def __refresh(self):
+        """Update the index of the music collection and of the playlists. Forget the previous answers if anything
+        changed.
+        """
+        start = time.monotonic()
+        changed_collection = self.__coll.refresh()
+        changed_playlists = self.__play.refresh()
+        if changed_collection or changed_playlists or not self.__answers:
+            self.__answers = {}
+            self.__display.show_validation('Index updated in {:,.2f}s'.format(time.monotonic() - start))
+
+    def __handle(self, connection):
+        """Read a query from a client, which is a JSON object on a single line, and send back the answer, which is
+        also a JSON object on a single line.
+
+        :param socket.socket connection: the connection to the client.
+        """
+        connection.settimeout(self.__timeout)
+        data = b''
+        try:
+            while not data.endswith(b'\n') and len(data) < self.__request_size_max:
+                chunk = connection.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            request = json.loads(data)
+            answer = self.__answer(request)
+        except (OSError, ValueError) as e:
+            answer = {'status': 1, 'stdout': '', 'stderr': 'The query could not be read: {}\n'.format(e)}
+
+        try:
+            connection.sendall(json.dumps(answer).encode() + b'\n')
+        except OSError:
+            pass
+
+    def __answer(self, request):
+        """Answer a query by running its actions over the index, or by sending back the previous answer to the same
+        query if the index did not change since then. The output of the actions is captured as it would have been
+        written on the terminal, in the format asked by the client. An action that fails unexpectedly is reported with
+        its traceback, and its answer is not kept, so that the query is run again next time.
+
+        :param dict request: the query, with the actions to run, the output format and whether to be quiet.
+        :return dict answer: the exit status as well as the standard output and error of the actions.
+        """
+        actions = tuple(request.get('actions', ()))
+        output_format = request.get('format', 'text')
+        quiet = bool(request.get('quiet', False))
+        key = (actions, output_format, quiet)
+        if key in self.__answers:
+            return self.__answers[key]
+
+        unknown = [action for action in actions if action not in self.__actions]
+        if not actions or unknown:
+            return {'status': 1, 'stdout': '', 'stderr': 'The daemon can only run the following actions: {}\n'
+                    .format(', '.join(self.__actions))}
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        status, failed = 0, False
+        previous_format, previous_quiet = self.__display.get_format(), self.__display.is_quiet()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                self.__display.set_format(output_format)
+                self.__display.set_quiet(quiet)
+                self.__runner.run(actions)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                status, failed = 1, True
+            finally:
+                self.__display.flush()
+                self.__display.set_format(previous_format)
+                self.__display.set_quiet(previous_quiet)
+
+        answer = {'status': status, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+        if not failed:
+            self.__answers[key] = answer
+        return answer
+
+
+class Client(object):
+    def __init__(self, display, preferences):
+        """Initialize the Client object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__socket_path = None
+
+    def init(self):
+        """Initialize the Client object. Get the path of the socket of the daemon in the Preferences."""
+        self.__socket_path = self.__prefs.get_daemon_socket()
+
+    def query(self, actions, output_format, quiet):
+        """Send a query to the daemon and write its answer as if the actions were run locally. If the daemon is not
+        running, generate an error and leave the program.
+
+        :param list actions: the names of the actions to run (e.g. 'pick', 'stats').
+        :param str output_format: the format of the output ('text', 'json' or 'ndjson').
+        :param bool quiet: True to hide the steps, the warnings and the progress.
+        :return int status: the exit status of the actions.
+        """
+        request = {'actions': list(actions), 'format': output_format, 'quiet': quiet}
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(self.__socket_path)
+                client.sendall(json.dumps(request).encode() + b'\n')
+                client.shutdown(socket.SHUT_WR)
+                with client.makefile('rb') as answer_file:
+                    answer = json.loads(answer_file.read())
+        except (FileNotFoundError, ConnectionRefusedError):
+            self.__display.show_error('The daemon is not running on \'{}\'. Please start it with '
+                                      '\'python audious.py --daemon\' and try again.'.format(self.__socket_path))
+            sys.exit(1)
+
+        sys.stdout.write(answer['stdout'])
+        sys.stderr.write(answer['stderr'])
+        return answer['status']
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import os
+import lib as audiouslib
+
+
+def locate(path, size):
+    """Locate the audio frames of a song, between the tags at its beginning (ID3v2, FLAC metadata blocks) and the tags
+    at its end (APEv2, ID3v1), so that two songs with the same audio but different tags have the same hash.
+
+    :param str path: full path of the song.
+    :param int size: the size of the song.
+    :return tuple location: the offset and the length of the audio frames.
+    """
+    with open(path, 'rb') as song_file:
+        offset = 0
+        header = song_file.read(10)
+        while header[:3] == b'ID3' and len(header) == 10:
+            # Sizes of ID3v2 tags are stored on 7 bits per byte, plus a footer of 10 bytes if flagged
+            offset += 10 + (header[6] << 21 | header[7] << 14 | header[8] << 7 | header[9]) + \
+                      (10 if header[5] & 0x10 else 0)
+            song_file.seek(offset)
+            header = song_file.read(10)
+
+        if header[:4] == b'fLaC':
+            offset += 4
+            song_file.seek(offset)
+            last = False
+            while not last:
+                block = song_file.read(4)
+                if len(block) < 4:
+                    break
+                last = bool(block[0] & 0x80)
+                offset += 4 + int.from_bytes(block[1:4], 'big')
+                song_file.seek(offset)
+
+        end = size
+        if end - offset >= 128:
+            song_file.seek(end - 128)
+            if song_file.read(3) == b'TAG':
+                end -= 128
+        if end - offset >= 32:
+            song_file.seek(end - 32)
+            footer = song_file.read(32)
+            if footer[:8] == b'APETAGEX':
+                # The size of APEv2 tags includes their footer, but not their header if flagged
+                end -= int.from_bytes(footer[12:16], 'little') + (32 if footer[23] & 0x80 else 0)
+
+    offset = min(offset, size)
+    return offset, max(0, end - offset)
+
+
+def digest(path, offset, length, chunk_size=1024 * 1024):
+    """Hash a range of a song. Defined at the module level so that the songs can be hashed by the workers of a pool;
+    hashlib releases the GIL while hashing large chunks, so that several songs are hashed at the same time.
+
+    :param str path: full path of the song.
+    :param int offset: the offset of the range.
+    :param int length: the length of the range.
+    :param int chunk_size: the size of the chunks read at once.
+    :return str digest: the hash of the range, or None if the song could not be read.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as song_file:
+            song_file.seek(offset)
+            while length > 0:
+                chunk = song_file.read(min(chunk_size, length))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                length -= len(chunk)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+
+def summarize(song, chunk_size):
+    """Locate the audio frames of a song and hash their first chunk.
+
+    :param Song song: the song, as found in the music collection.
+    :param int chunk_size: the size of the first chunk.
+    :return tuple summary: the offset and the length of the audio frames and the hash of their first chunk, or None if
+     the song could not be read.
+    """
+    try:
+        offset, length = locate(song.path, song.size)
+    except OSError:
+        return None
+    partial = digest(song.path, offset, min(length, chunk_size))
+    return (offset, length, partial) if partial is not None else None
+
+
+class Deduplicator(object):
+    def __init__(self, display, preferences, collection):
+        """Initialize the Deduplicator object internally."""
+        self.__display = display
+        self.__prefs = preferences
+        self.__coll = collection
+        self.__meta = audiouslib.metadata.Metadata(display, preferences)
+
+        self.__collection_path_root = None
+        self.__collection_paths_music_categories = None
+        self.__workers = None
+        self.__cache_name = 'hashes.db'
+        self.__cache_version = 1
+        self.__cache_connection = None
+        self.__cache_commit_every = 100
+        self.__partial_size = 64 * 1024
+        self.__byte_to_gigabyte = 1 / (1024 * 1024 * 1024)
+        self.__total_sets = 0
+        self.__total_duplicates = 0
+        self.__total_wasted = 0
+
+    def init(self):
+        """Initialize the Deduplicator object. Also open the cache of the hashes."""
+        self.__coll.init()
+        self.__meta.init()
+        self.__collection_path_root = self.__prefs.get_collection_path_root()
+        self.__collection_paths_music_categories = self.__prefs.get_collection_paths_music_categories()
+        self.__workers = self.__prefs.get_performance_workers()
+
+        self.__cache_connection = audiouslib.cache.open_cache(
+            self.__prefs, self.__cache_name, self.__cache_version,
+            {'hashes': '(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, offset INTEGER, length INTEGER, '
+                       'partial TEXT, full TEXT)'})
+
+    def find(self):
+        """Find the songs with identical audio across all the categories of the music collection. Each step only keeps
+        the songs that could still have a duplicate, so that most songs are never read:
+        1. The songs are grouped by format and duration, which are already in the metadata cache.
+        2. The candidates are grouped by the length of their audio frames and the hash of their first chunk.
+        3. The remaining candidates are grouped by the hash of all their audio frames.
+        The songs are hashed in parallel by the workers set in the Preferences, and the hashes are cached along with the
+        size and the last modification time of the songs, so that only new or modified songs are hashed again.
+        """
+        try:
+            self.__display.show_substep('Grouping songs by duration')
+            songs = []
+            for category in self.__collection_paths_music_categories:
+                songs.extend(song for song in self.__coll.get_category_songs(category)
+                             if not song.path.rsplit('/', 1)[1].startswith('.'))
+            tags = self.__meta.get_many(songs)
+            groups = self.__group(songs, lambda song: (os.path.splitext(song.path)[1], tags[song.path].duration)
+                                  if song.path in tags else None)
+            self.__show_candidates(len(songs), groups)
+
+            self.__display.show_substep('Hashing the beginning of the candidates')
+            candidates = [song for group in groups for song in group]
+            summaries = self.__get_summaries(candidates)
+            groups = [subgroup for group in groups for subgroup in
+                      self.__group(group, lambda song: summaries[song.path][1:] if song.path in summaries else None)]
+            self.__show_candidates(len(candidates), groups)
+
+            self.__display.show_substep('Hashing the audio of the candidates')
+            hashes = self.__get_hashes([song for group in groups for song in group], summaries)
+            groups = [subgroup for group in groups for subgroup in
+                      self.__group(group, lambda song: hashes.get(song.path))]
+
+            self.__show_duplicates(groups)
+            self.__show_summary()
+        finally:
+            self.__meta.close()
+            self.__cache_connection.commit()
+            self.__cache_connection.close()
+
+    def __group(self, songs, key):
+        """Group songs by a key and only keep the groups of at least two songs.
+
+        :param list songs: the songs, as found in the music collection.
+        :param func key: the function giving the key of a song, or None to leave the song out.
+        :return list groups: the lists of songs sharing the same key.
+        """
+        groups = collections.defaultdict(list)
+        for song in songs:
+            song_key = key(song)
+            if song_key is not None:
+                groups[song_key].append(song)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def __get_summaries(self, songs):
+        """Get the location of the audio frames and the hash of their first chunk for several songs, from the cache or
+        by reading the songs in parallel.
+
+        :param list songs: the songs, as found in the music collection.
+        :return dict summaries: tuples of offset, length and partial hash, indexed by the full paths of the songs.
+        """
+        summaries, misses = {}, []
+        for song in songs:
+            row = self.__cache_connection.execute('SELECT size, mtime, offset, length, partial FROM hashes '
+                                                  'WHERE path = ?', (song.path,)).fetchone()
+            if row is not None and row[0] == song.size and row[1] == song.mtime:
+                summaries[song.path] = row[2:]
+            else:
+                misses.append(song)
+        self.__display.show_validation('{} songs to hash, {} already hashed'
+                                       .format(len(misses), len(songs) - len(misses)))
+
+        with audiouslib.profiler.profiler.phase('hash', len(misses), len(misses) * self.__partial_size), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            results = executor.map(functools.partial(summarize, chunk_size=self.__partial_size), misses)
+            for number, (song, summary) in enumerate(zip(misses, results), 1):
+                if summary is None:
+                    self.__display.show_error('The following song could not be read and will be ignored: '
+                                              '\'{}\''.format(song.path))
+                    continue
+                summaries[song.path] = summary
+                self.__cache_connection.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, NULL)',
+                                                (song.path, song.size, song.mtime) + summary)
+                if number % self.__cache_commit_every == 0:
+                    self.__cache_connection.commit()
+        return summaries
+
+    def __get_hashes(self, songs, summaries):
+        """Get the hash of all the audio frames of several songs, from the cache or by reading the songs in parallel.
+
+        :param list songs: the songs, as found in the music collection.
+        :param dict summaries: tuples of offset, length and partial hash, indexed by the full paths of the songs.
+        :return dict hashes: the hashes of the audio frames, indexed by the full paths of the songs.
+        """
+        hashes, misses = {}, []
+        for song in songs:
+            row = self.__cache_connection.execute('SELECT full FROM hashes WHERE path = ?', (song.path,)).fetchone()
+            if row is not None and row[0] is not None:
+                hashes[song.path] = row[0]
+            else:
+                misses.append(song)
+        self.__display.show_validation('{} songs to hash, {} already hashed'
+                                       .format(len(misses), len(songs) - len(misses)))
+
+        with audiouslib.profiler.profiler.phase('hash', len(misses), sum(song.size for song in misses)), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            results = executor.map(digest, [song.path for song in misses],
+                                   [summaries[song.path][0] for song in misses],
+                                   [summaries[song.path][1] for song in misses])
+            for number, (song, full) in enumerate(zip(misses, results), 1):
+                if full is None:
+                    self.__display.show_error('The following song could not be read and will be ignored: '
+                                              '\'{}\''.format(song.path))
+                    continue
+                hashes[song.path] = full
+                self.__cache_connection.execute('UPDATE hashes SET full = ? WHERE path = ?', (full, song.path))
+                if number % self.__cache_commit_every == 0:
+                    self.__cache_connection.commit()
+        return hashes
+
+    def __show_candidates(self, total, groups):
+        """Show the number of songs that could still have a duplicate after a step.
+
+        :param int total: the number of songs considered by the step.
+        :param list groups: the groups of candidates found by the step.
+        """
+        candidates = sum(map(len, groups))
+        self.__display.show_validation('{} songs out of {} could have a duplicate'.format(candidates, total))
+
+    def __show_duplicates(self, groups):
+        """Show the sets of songs with identical audio, along with the space that they waste. The largest sets in
+        wasted space are shown first.
+
+        :param list groups: the lists of songs with identical audio.
+        """
+        self.__display.show_substep('Duplicates')
+        groups = sorted(groups, key=lambda group: -sum(song.size for song in group[1:]))
+        for group in groups:
+            group = sorted(group, key=lambda song: song.path)
+            wasted = sum(song.size for song in group[1:])
+            self.__total_sets += 1
+            self.__total_duplicates += len(group) - 1
+            self.__total_wasted += wasted
+
+            self.__display.show_warning('Same audio in {} songs ({:,.2f} GB wasted):'
+                                        .format(len(group), wasted * self.__byte_to_gigabyte))
+            paths = [song.path.replace(self.__collection_path_root, '') for song in group]
+            for path in paths:
+                self.__display.show_error('  \'{}\''.format(path))
+            self.__display.show_record({'type': 'duplicate', 'songs': paths, 'wasted': wasted})
+
+    def __show_summary(self):
+        """Show the summary of the duplicates, including the number of duplicates and the space that they waste."""
+        self.__display.show_substep('Summary')
+        if self.__total_sets == 0:
+            self.__display.show_validation('No duplicates were found')
+        else:
+            self.__display.show_warning('Duplicates: {} songs in {} sets, {:,.2f} GB wasted'
+                                        .format(self.__total_duplicates, self.__total_sets,
+                                                self.__total_wasted * self.__byte_to_gigabyte))
+        self.__display.show_record({'type': 'summary', 'sets': self.__total_sets,
+                                    'duplicates': self.__total_duplicates, 'wasted': self.__total_wasted})
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
-import colorama
+import json
 import sys
+import lib as audiouslib
 
 
 class Display(object):
@@ -9,45 +10,153 @@ class Display(object):
         self.__header_main = '\u266A '
         self.__header = '\u2192 '
 
+        self.__formats = ('text', 'json', 'ndjson')
+        self.__format = 'text'
+        self.__quiet = False
+        self.__action = None
+        self.__records = []
+        self.__records_buffer_size = 1000
+
+    def set_format(self, output_format):
+        """Set the format of the output. In 'text', the messages are displayed with colors. In 'json' and 'ndjson', the
+        results are written on the standard output as structured records, either all at once in a JSON array or one
+        JSON object per line, while the other messages are written on the standard error without colors.
+
+        :param str output_format: the format of the output ('text', 'json' or 'ndjson').
+        """
+        if output_format not in self.__formats:
+            self.show_error('The output format \'{}\' is not supported. Please use one of the following formats: {}.'
+                            .format(output_format, ', '.join(self.__formats)))
+            sys.exit(0)
+        self.__format = output_format
+
+    def get_format(self):
+        """Get the format of the output.
+
+        :return str output_format: the format of the output ('text', 'json' or 'ndjson').
+        """
+        return self.__format
+
+    def set_quiet(self, quiet):
+        """Set whether the steps, the warnings and the progress are hidden.
+
+        :param bool quiet: True to hide the steps, the warnings and the progress.
+        """
+        self.__quiet = quiet
+
+    def is_quiet(self):
+        """Check whether the steps, the warnings and the progress are hidden.
+
+        :return bool quiet: True if the steps, the warnings and the progress are hidden.
+        """
+        return self.__quiet
+
+    def set_action(self, action):
+        """Set the action that is running, which name is added to the records.
+
+        :param str action: the name of the action (e.g. 'pick'), or None if no action is running.
+        """
+        self.__action = action
+
+    def __print(self, colors, message, noise=True):
+        """Print a message on the terminal. In text, the message is printed with its colors on the standard output.
+        Otherwise, the standard output is kept for the records and the message is printed without colors on the
+        standard error. Messages that are only noise are not printed at all in quiet mode.
+
+        :param tuple colors: the names of the colorama style and color of the message (e.g. ('NORMAL', 'RED')).
+        :param str message: the message to print.
+        :param bool noise: True if the message can be hidden in quiet mode.
+        """
+        if noise and self.__quiet:
+            return
+        with audiouslib.profiler.profiler.phase('output', size=len(message)):
+            if self.__format == 'text':
+                print(self.__get_colors(colors) + message + self.__get_colors(None))
+            else:
+                print(message, file=sys.stderr)
+
+    def __get_colors(self, colors):
+        """Get the escape sequences of a style and a color. Colorama is only imported the first time a message is
+        printed in text, so that it is not loaded when nothing is printed or when the output is structured.
+
+        :param tuple colors: the names of the colorama style and color (e.g. ('NORMAL', 'RED')), or None to reset them.
+        :return str sequences: the escape sequences.
+        """
+        import colorama
+        if colors is None:
+            return colorama.Style.RESET_ALL
+        style, color = colors
+        return getattr(colorama.Style, style) + getattr(colorama.Fore, color)
+
+    def show_record(self, record):
+        """Write a structured record (e.g. a picked album, the statistics of a category, an exported song) when the
+        output format is 'json' or 'ndjson'. The records are buffered and written in batches rather than one by one.
+
+        :param dict record: the record to write, which type is given by its 'type' key.
+        """
+        if self.__format == 'text':
+            return
+        if self.__action is not None:
+            record = dict(action=self.__action, **record)
+        self.__records.append(record)
+        if self.__format == 'ndjson' and len(self.__records) >= self.__records_buffer_size:
+            self.__write_records()
+
+    def __write_records(self):
+        """Write the buffered records on the standard output, one JSON object per line."""
+        with audiouslib.profiler.profiler.phase('output', len(self.__records)):
+            sys.stdout.write(''.join(json.dumps(record) + '\n' for record in self.__records))
+        self.__records = []
+
+    def flush(self):
+        """Write the remaining records on the standard output: the pending lines in 'ndjson', or the JSON array of all
+        the records in 'json'.
+        """
+        if self.__format == 'ndjson':
+            self.__write_records()
+        elif self.__format == 'json':
+            with audiouslib.profiler.profiler.phase('output', len(self.__records)):
+                json.dump(self.__records, sys.stdout, indent=2)
+                sys.stdout.write('\n')
+            self.__records = []
+        sys.stdout.flush()
+
     def show_error(self, message):
         """Display an error message.
 
         :param str message: error message to display.
         """
-        style = colorama.Style.NORMAL + colorama.Fore.RED + message + colorama.Style.RESET_ALL
-        print(style)
+        self.__print(('NORMAL', 'RED'), message, noise=False)
 
     def show_picked_album_even(self, album):
         """Display a picked album (even in the list).
 
         :param str album: the even album to display.
         """
-        style = colorama.Style.NORMAL + colorama.Fore.CYAN + ' ' * 2 + '\u2b91  ' + album + colorama.Style.RESET_ALL
-        print(style)
+        if self.__format == 'text':
+            self.__print(('NORMAL', 'CYAN'), ' ' * 2 + '\u2b91  ' + album, noise=False)
 
     def show_picked_album_odd(self, album):
         """Display a picked album (odd in the list).
 
         :param str album: the odd album to display.
         """
-        style = colorama.Style.NORMAL + colorama.Fore.GREEN + ' ' * 2 + '\u2b91  ' + album + colorama.Style.RESET_ALL
-        print(style)
+        if self.__format == 'text':
+            self.__print(('NORMAL', 'GREEN'), ' ' * 2 + '\u2b91  ' + album, noise=False)
 
     def show_step(self, message):
         """Display a step message.
 
         :param str message: step message to display.
         """
-        style = colorama.Style.BRIGHT + colorama.Fore.RED + self.__header_main + message + colorama.Style.RESET_ALL
-        print(style)
+        self.__print(('BRIGHT', 'RED'), self.__header_main + message)
 
     def show_substep(self, message):
         """Display a substep message.
 
         :param str message: substep message to display.
         """
-        style = colorama.Style.BRIGHT + colorama.Fore.WHITE + '\n' + self.__header + message + colorama.Style.RESET_ALL
-        print(style)
+        self.__print(('BRIGHT', 'WHITE'), '\n' + self.__header + message)
 
     def show_triple(self, method, total, plural, singular, zero):
         """Display three messages of the same type. Also check if the Display object has an attribute called with an
@@ -75,25 +184,41 @@ class Display(object):
 
         :param str message: validation message to display.
         """
-        style = colorama.Style.NORMAL + colorama.Fore.BLUE + self.__header + message + colorama.Style.RESET_ALL
-        print(style)
+        self.__print(('NORMAL', 'BLUE'), self.__header + message, noise=False)
+
+    def show_progress(self, message):
+        """Display a progress message, which is hidden in quiet mode.
+
+        :param str message: progress message to display.
+        """
+        self.__print(('NORMAL', 'BLUE'), self.__header + message)
 
     def show_warning(self, message):
         """Display a warning message.
 
         :param str message: validation message to display.
         """
-        style = colorama.Style.NORMAL + colorama.Fore.YELLOW + self.__header + message + colorama.Style.RESET_ALL
-        print(style)
+        self.__print(('NORMAL', 'YELLOW'), self.__header + message)
+
+    def show_newline(self):
+        """Display an empty line to separate two groups of messages."""
+        print(file=sys.stdout if self.__format == 'text' else sys.stderr)
 
     def show_warning_question(self, message):
-        """Display a warning question.
+        """Display a warning question. The question is always displayed, even in quiet mode, and on the standard error
+        when the standard output is kept for the records.
 
         :param str message: question to display.
         """
-        style = colorama.Style.NORMAL + colorama.Fore.YELLOW + self.__header + message + colorama.Style.RESET_ALL
         while True:
-            answer = input(style).lower().strip()
+            if self.__format == 'text':
+                answer = input(self.__get_colors(('NORMAL', 'YELLOW')) + self.__header + message +
+                               self.__get_colors(None))
+            else:
+                sys.stderr.write(self.__header + message)
+                sys.stderr.flush()
+                answer = input()
+            answer = answer.lower().strip()
             if answer in ('y', 'yes'):
                 return answer in ('y', 'yes')
             elif answer in ('n', 'no'):
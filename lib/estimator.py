@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import json
+import os
+
+
+class Estimator(object):
+    def __init__(self, display, preferences):
+        """Initialize the Estimator object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__exportation_format = None
+        self.__bitrate = None
+        self.__encoders = None
+        self.__rates_name = 'estimates.json'
+        self.__rates_path = None
+        self.__rates = {'encoding_speed': 40., 'copy_speed': 100. * 1024 * 1024}
+        self.__recording_minimum = 5.
+
+    def init(self, bitrate=None):
+        """Initialize the Estimator object. Load the speeds measured during the previous exportations, if any, from the
+        cache directory. Speeds that are not positive numbers are ignored.
+
+        :param int bitrate: the average bitrate of the exported songs in bits per second, for an MP3 exportation.
+        """
+        self.__exportation_format = self.__prefs.get_exportation_format()
+        self.__encoders = self.__prefs.get_performance_encoders()
+        self.__bitrate = bitrate
+        self.__rates_path = os.path.join(self.__prefs.get_cache_path(), self.__rates_name)
+        try:
+            with open(self.__rates_path, 'r') as rates_file:
+                rates = json.load(rates_file)
+            self.__rates.update((name, rate) for name, rate in rates.items() if name in self.__rates and
+                                isinstance(rate, (int, float)) and not isinstance(rate, bool) and rate > 0)
+        except (FileNotFoundError, ValueError, AttributeError):
+            pass
+
+    def get_size(self, song, tag):
+        """Estimate the size of an exported song. In FLAC, the song is copied as it is. In MP3, the size is estimated
+        from the duration of the song and the average bitrate of the encoder settings.
+
+        :param Song song: the song, as found in the music collection.
+        :param Tag tag: the metadata of the song, or None if not available.
+        :return int size: the estimated size of the exported song in bytes.
+        """
+        if self.__exportation_format == 'mp3' and tag is not None:
+            return min(song.size, int(tag.duration * self.__bitrate / 8))
+        return song.size
+
+    def get_time(self, size, duration):
+        """Estimate the time needed to export songs, from the speeds measured during the previous exportations.
+
+        :param int size: the total size of the songs in the music collection in bytes.
+        :param float duration: the total duration of the songs in seconds.
+        :return float time: the estimated time in seconds, or 0 if no speed is known.
+        """
+        if self.__exportation_format == 'mp3':
+            speed = self.__rates['encoding_speed'] * self.__encoders
+            return duration / speed if speed > 0 else 0.
+        speed = self.__rates['copy_speed']
+        return size / speed if speed > 0 else 0.
+
+    def record(self, size, duration, time):
+        """Record the speed measured during an exportation, so that the next estimates are closer to reality. Short
+        exportations are ignored as they are not significant, as well as exportations where every song was skipped.
+
+        :param int size: the total size of the exported songs in the music collection in bytes.
+        :param float duration: the total duration of the exported songs in seconds.
+        :param float time: the time that the exportation took in seconds.
+        """
+        if time < self.__recording_minimum:
+            return
+        if self.__exportation_format == 'mp3':
+            if duration <= 0:
+                return
+            self.__rates['encoding_speed'] = duration / time / self.__encoders
+        else:
+            if size <= 0:
+                return
+            self.__rates['copy_speed'] = size / time
+
+        with open(self.__rates_path, 'w') as rates_file:
+            json.dump(self.__rates, rates_file)
@@ -1,78 +1,159 @@
 #!/usr/bin/env python3
+import contextlib
+import datetime
+import os
 import pathlib
-import shutil
-import subprocess
-import tinytag
+import time
 import lib as audiouslib
 
 
 class Exporter(object):
-    def __init__(self, display, preferences, collection):
-        """Initialize the Exporter object internally."""
+    def __init__(self, display, preferences, collection, playlists=None):
+        """Initialize the Exporter object internally. The playlists can be shared with other objects, so that they are
+        parsed only once.
+        """
         self.__display = display
         self.__prefs = preferences
         self.__coll = collection
-        self.__play = audiouslib.playlists.Playlists(display, preferences)
+        self.__play = playlists or audiouslib.playlists.Playlists(display, preferences)
+        self.__meta = audiouslib.metadata.Metadata(display, preferences)
+        self.__transcoder = audiouslib.transcoder.Transcoder(display, preferences)
+        self.__manifest = audiouslib.manifest.Manifest(display, preferences)
+        self.__pipeline = audiouslib.pipeline.Pipeline(display, preferences)
+        self.__estimator = audiouslib.estimator.Estimator(display, preferences)
+        self.__progress = audiouslib.progress.Progress(display, preferences, 'Exported', ('encoded', 'copied'),
+                                                       ('skipped', 'failed'))
 
         self.__collection_path_root = None
         self.__exportation_path_root = None
         self.__exportation_format = None
+        self.__exportation_settings = None
+        self.__exportation_playlists_format = None
+        self.__tags = {}
         self.__byte_to_gigabyte = 1 / (1024 * 1024 * 1024)
         self.__number_digits = 2
 
     def init(self):
         """Initialize the Exporter object."""
         self.__play.init()
+        self.__coll.init()
+        self.__meta.init()
         self.__exportation_format = self.__prefs.get_exportation_format()
+        if self.__exportation_format == 'mp3':
+            self.__transcoder.init()
+            self.__exportation_settings = self.__transcoder.get_settings()
+            self.__estimator.init(self.__transcoder.get_bitrate())
+        else:
+            self.__exportation_settings = 'copy'
+            self.__estimator.init()
+        self.__exportation_playlists_format = self.__prefs.get_exportation_playlists_format()
         self.__exportation_path_root = self.__prefs.get_exportation_path_root()
         self.__collection_path_root = self.__prefs.get_collection_path_root()
+        self.__manifest.init(self.__exportation_path_root)
+        self.__pipeline.init()
 
     def export(self):
         """Main function that is used for the exportation process. First get all the songs that are available in the
         playlists. Give an overview of the hard drive space that will be required and ask confirmation before
-        continuing. Export the songs in the format selected in the Preferences. Finally, export the playlists.
+        continuing. Export the songs in the format selected in the Preferences; the songs that were already exported
+        and did not change are skipped, and the songs that are not in the playlists anymore are removed. Finally,
+        export the playlists.
         """
         playlists_songs = self.__play.get_songs()
 
-        exportation_size = self.__get_exportation_size(playlists_songs)
-        self.__show_exportation_size(exportation_size)
+        estimates_playlists, estimate = self.__get_exportation_estimates(playlists_songs)
+        self.__show_exportation_estimates(estimates_playlists, estimate)
 
         self.__show_exportation_format()
-        self.__export_songs(playlists_songs)
+        self.__export_songs(playlists_songs, estimate)
 
         self.__show_exportation_playlists()
         self.__export_playlists()
+        self.__meta.close()
 
-    def __get_exportation_size(self, playlists_songs):
-        """Calculate the total size of the exportation process in GigaBytes.
+    def __get_exportation_estimates(self, playlists_songs):
+        """Estimate the size and the time of the exportation process, for each playlist and in total. The sizes are the
+        ones found while scanning the music collection and, for an MP3 exportation, the durations are read from the
+        metadata of the songs. The metadata of all the songs of the playlists are gathered once, from the cache or by
+        parsing the missing ones in parallel, and kept to write the exported playlists. The songs that were already
+        exported are not taken into account.
 
         :param list playlists_songs: list of all songs available in the playlists.
-        :return float exportation_size: the total size of the exportation process in GigaBytes.
+        :return tuple estimates: the estimates of each playlist, indexed by playlist name, and the total estimate.
         """
-        exportation_size = 0.
-        for song in playlists_songs:
-            try:
-                exportation_size += pathlib.Path(song).stat().st_size
-            except FileNotFoundError as f:
-                self.__display.show_error('The following song was not found: \'{}\''.format(f.filename))
+        songs, found = {}, []
+        for path in playlists_songs:
+            song = self.__coll.get_song(path)
+            if song is None:
+                self.__display.show_error('The following song was not found: \'{}\''.format(path))
+            elif pathlib.PurePath(path).suffix == '.flac':
+                found.append(song)
+                if not self.__is_exported(song):
+                    songs[path] = song
+
+        tags = self.__tags = self.__meta.get_many(found)
+
+        estimates_playlists = {}
+        for playlist in self.__play.get_playlists_paths():
+            playlist_songs = [path for path in dict.fromkeys(self.__play.get_playlist_songs(playlist)) if path in songs]
+            playlist_name = playlist.rsplit('/', 1)[1]
+            estimates_playlists[playlist_name] = self.__get_exportation_estimate(playlist_songs, songs, tags)
+        estimate = self.__get_exportation_estimate(list(songs), songs, tags)
 
-        exportation_size = round(exportation_size * self.__byte_to_gigabyte, self.__number_digits)
-        return exportation_size
+        return estimates_playlists, estimate
 
-    def __show_exportation_size(self, exportation_size):
-        """Show the exportation size that will be required.
+    def __get_exportation_estimate(self, paths, songs, tags):
+        """Estimate the size and the time needed to export a list of songs.
 
-        :param float exportation_size: the total size of the exportation process in GigaBytes.
+        :param list paths: full paths of the songs to export.
+        :param dict songs: the songs to export, indexed by their full paths.
+        :param dict tags: the metadata of the songs, indexed by their full paths.
+        :return dict estimate: the number of songs, their size in the music collection and their duration, as well as
+         the estimated size and time of the exportation.
+        """
+        estimate = {'songs': len(paths), 'source_size': 0, 'duration': 0., 'size': 0}
+        for path in paths:
+            tag = tags.get(path)
+            estimate['source_size'] += songs[path].size
+            estimate['duration'] += tag.duration if tag is not None else 0.
+            estimate['size'] += self.__estimator.get_size(songs[path], tag)
+        estimate['time'] = self.__estimator.get_time(estimate['source_size'], estimate['duration'])
+        return estimate
+
+    def __show_exportation_estimates(self, estimates_playlists, estimate):
+        """Show the exportation size and time that will be required, for each playlist and in total, and ask
+        confirmation before continuing.
+
+        :param dict estimates_playlists: the estimates of each playlist, indexed by playlist name.
+        :param dict estimate: the total estimate.
         """
         self.__display.show_substep('Calculating exportation size')
-        self.__display.show_warning_question('A maximum of {:,.2f} additional GB will be created on the disk. Shall '
-                                             'we continue? (y/n): '.format(exportation_size))
+        for name, estimate_playlist in estimates_playlists.items():
+            self.__display.show_record(dict(type='estimate', playlist=name, **estimate_playlist))
+            self.__display.show_validation('\'{}\': {} songs to export, about {:,.2f} GB in {}'
+                                           .format(name, estimate_playlist['songs'],
+                                                   estimate_playlist['size'] * self.__byte_to_gigabyte,
+                                                   self.__convert_duration(estimate_playlist['time'])))
+        self.__display.show_record(dict(type='estimate', playlist=None, **estimate))
+        self.__display.show_warning_question('About {:,.2f} additional GB will be created on the disk and the '
+                                             'exportation should take about {}. Shall we continue? (y/n): '
+                                             .format(round(estimate['size'] * self.__byte_to_gigabyte,
+                                                           self.__number_digits),
+                                                     self.__convert_duration(estimate['time'])))
         self.__display.show_warning('Note that only songs found in the music collection will be used to calculate the '
                                     'total exportation size.')
         self.__display.show_warning('If a song is not found, please ensure that it is in your music collection. If '
                                     'not, remove it from the playlist not to see again an error message about this '
                                     'song.')
 
+    def __convert_duration(self, duration):
+        """Convert a duration in seconds into a more readable format.
+
+        :param float duration: the duration in seconds.
+        :return str duration: the duration converted in a more readable format.
+        """
+        return str(datetime.timedelta(seconds=round(duration)))
+
     def __show_exportation_format(self):
         """Show the exportation format that is selected in the Preferences."""
         self.__display.show_substep('Exporting songs')
@@ -84,114 +165,143 @@ class Exporter(object):
         elif self.__exportation_format == 'mp3':
             self.__display.show_validation('Exporting playlists in MP3')
 
-    def __export_songs(self, playlists_songs):
+    def __export_songs(self, playlists_songs, estimate):
         """Export all the songs that are available in the playlists. Indicate the number of songs to export. Also
         select the appropriate format for the exportation by checking that the file to convert has the '.flac'
-        extension. If not, the file will be ignored. Initialize and increment a counter to get an overview of the
-        exportation process.
+        extension. If not, the file will be ignored. The songs that were already exported and did not change are
+        skipped, and all the directories required by the other songs are created at once, before the exportation. The
+        other songs go through the Pipeline, which reads, converts in parallel if necessary, and writes the songs at
+        the same time. The progress is reported at a regular interval, and the time spent in the Pipeline is recorded to
+        improve the next estimates. Finally, remove the exported songs that are not in the playlists anymore.
 
         :param list playlists_songs: list of all songs available in the playlists.
+        :param dict estimate: the total estimate of the exportation, with the size and the duration of the songs.
         """
         total_playlists_songs = len(playlists_songs)
         self.__display.show_warning('Depending on the quantity of songs, this operation might take a while...')
         self.__display.show_validation('Quantity of songs: {}'.format(total_playlists_songs))
-        cnt = 1
+        exportation_paths_songs = set()
+        songs = []
+        skipped = 0
 
         for collection_path_song in playlists_songs:
             extension_flac = pathlib.Path(collection_path_song).suffix
             if extension_flac == '.flac':
-                exportation_path_song = self.__create_exportation_architecture(collection_path_song)
-                if self.__exportation_format == 'flac':
-                    self.__export_song_flac(collection_path_song, exportation_path_song, cnt, total_playlists_songs)
-                elif self.__exportation_format == 'mp3':
-                    self.__export_song_mp3(collection_path_song, exportation_path_song, cnt, total_playlists_songs)
-            else:
-                pass
-            cnt += 1
+                exportation_path_song = self.__get_exportation_path_song(collection_path_song)
+                exportation_paths_songs.add(exportation_path_song)
+                song = self.__coll.get_song(collection_path_song)
+                if song is not None and self.__is_exported(song):
+                    skipped += 1
+                    self.__show_exported_song(collection_path_song, exportation_path_song, 'skipped')
+                else:
+                    songs.append((collection_path_song, exportation_path_song, song.size if song is not None else 0))
+
+        self.__progress.start(len(songs) + skipped, sum(size for _, _, size in songs))
+        for _ in range(skipped):
+            self.__progress.update('skipped', 0)
+
+        self.__create_exportation_architecture([exportation_path_song for _, exportation_path_song, _ in songs])
+        encode = self.__transcoder.encode if self.__exportation_format == 'mp3' else None
+        jobs = (song[:2] for song in songs)
+        start = time.monotonic()
+        for (_, _, size), result in zip(songs, self.__pipeline.run(jobs, encode)):
+            self.__report_exported_song(*result, size)
+        self.__estimator.record(estimate['source_size'], estimate['duration'], time.monotonic() - start)
+        self.__progress.finish()
+
+        for exportation_path_song in self.__manifest.remove_missing(exportation_paths_songs):
+            self.__display.show_validation('Removed as not in the playlists anymore: \'{}\''
+                                           .format(exportation_path_song))
+            self.__display.show_record({'type': 'removed', 'destination': exportation_path_song})
 
     def __show_exportation_playlists(self):
         """Show the playlists that will be exported during the exportation process."""
         self.__display.show_substep('Exporting playlists')
 
-    def __create_exportation_architecture(self, collection_path_song):
-        """Create the directories for the exportation, following the same architecture that is available in the music
-        collection. Create all the parent directories if necessary.
+    def __get_exportation_path_song(self, collection_path_song):
+        """Get the full path of a song in the exportation directory, following the same architecture that is available
+        in the music collection and with the extension of the exportation format.
 
         :param str collection_path_song: full path of the song in the music collection.
         :return str exportation_path_song: full path of the song in the exportation directory.
         """
         exportation_path_song = collection_path_song.replace(self.__collection_path_root, self.__exportation_path_root)
-        exportation_path_album = exportation_path_song.rsplit('/', 1)[0]
-        exportation_path_album = pathlib.Path(exportation_path_album)
-        exportation_path_album.mkdir(parents=True, exist_ok=True)
-
+        if self.__exportation_format == 'mp3':
+            exportation_path_song = exportation_path_song[:-len('.flac')] + '.mp3'
         return exportation_path_song
 
-    def __export_song_flac(self, collection_path_song, exportation_path_song, cnt, total_playlists_songs):
-        """Export a song in FLAC contained in the playlists. As the music collection is only with FLAC songs, this
-        function actually copies the files and does not perform any conversion. Copy the song in the exportation
-        directory, while preserving the song OS metadata (e.g. date, last modification, etc.).
+    def __is_exported(self, song):
+        """Check if a song was already exported by a previous exportation and did not change since then.
+
+        :param Song song: the song, as found in the music collection.
+        :return bool exported: True if the song does not need to be exported again.
+        """
+        exportation_path_song = self.__get_exportation_path_song(song.path)
+        return self.__manifest.is_exported(song, exportation_path_song, self.__exportation_format,
+                                           self.__exportation_settings)
+
+    def __add_exported_song(self, collection_path_song, exportation_path_song):
+        """Record a song that was successfully exported in the manifest.
 
         :param str collection_path_song: full path of the song in the music collection.
         :param str exportation_path_song: full path of the song in the exportation directory.
-        :param int cnt: counter for current song.
-        :param int total_playlists_songs: total of songs to export.
         """
-        try:
-            shutil.copy2(collection_path_song, exportation_path_song)
-            self.__show_exported_song(collection_path_song, exportation_path_song, cnt, total_playlists_songs)
-        except FileNotFoundError as f:
-            self.__display.show_error('The following song was not found: \'{}\''.format(f.filename))
+        song = self.__coll.get_song(collection_path_song)
+        if song is not None:
+            self.__manifest.add(song, exportation_path_song, self.__exportation_format, self.__exportation_settings)
 
-    def __export_song_mp3(self, collection_path_song, exportation_path_song, cnt, total_playlists_songs):
-        """Export a song in MP3 contained in the playlists. As the music collection is only with FLAC songs, this
-        function actually converts the files from FLAC to MP3 via FFmpeg. After conversion, copy the song in the
-        exportation directory, while preserving the song OS metadata (e.g. date, last modification, etc.).
+    def __create_exportation_architecture(self, exportation_paths_songs):
+        """Create the directories for the exportation, following the same architecture that is available in the music
+        collection. Each directory is created only once, along with all its parent directories if necessary.
+
+        :param list exportation_paths_songs: full paths of the songs in the exportation directory.
+        """
+        exportation_paths_albums = {exportation_path_song.rsplit('/', 1)[0]
+                                    for exportation_path_song in exportation_paths_songs}
+        for exportation_path_album in sorted(exportation_paths_albums):
+            pathlib.Path(exportation_path_album).mkdir(parents=True, exist_ok=True)
+
+    def __report_exported_song(self, collection_path_song, exportation_path_song, status, error, size):
+        """Report a song that went through the Pipeline. If the song was successfully exported, record it in the
+        manifest. Otherwise, show why the song could not be converted or written.
 
         :param str collection_path_song: full path of the song in the music collection.
         :param str exportation_path_song: full path of the song in the exportation directory.
-        :param int cnt: counter for current song.
-        :param int total_playlists_songs: total of songs to export.
+        :param int status: the exit status of FFmpeg, or 0 if the song was not converted.
+        :param OSError error: the error raised while writing the song, or None if successful.
+        :param int size: size of the song in the music collection.
         """
-        exportation_path_song = exportation_path_song.replace('.flac', '.mp3')
-        try:
-            command = 'ffmpeg -v quiet -y -i "{}" ' \
-                      '-codec:a libmp3lame -qscale:a 0 -map_metadata 0 -id3v2_version 3 ' \
-                      '"{}"'.format(collection_path_song, exportation_path_song)
-            subprocess.run(command, shell=True)
-            self.__show_exported_song(collection_path_song, exportation_path_song, cnt, total_playlists_songs)
-        except FileNotFoundError as f:
-            self.__display.show_error('The following song was not found: \'{}\''.format(f.filename))
-        except NameError as n:
-            self.__display.show_error('The following error occurred during the MP3 conversion:\n{}'.format(n))
-
-    def __show_exported_song(self, collection_path_song, exportation_path_song, cnt, total_playlists_songs):
-        """Show the song that has been successfully exported. Try to show song metadata first. If no metadata found,
-        show only the name of the song and the corresponding album.
+        if status != 0:
+            self.__display.show_error('The following song could not be converted (FFmpeg exit status: {}): '
+                                      '\'{}\''.format(status, collection_path_song))
+            stage = 'failed'
+        elif isinstance(error, FileNotFoundError):
+            self.__display.show_error('The following song was not found: \'{}\''.format(collection_path_song))
+            stage = 'failed'
+        elif error is not None:
+            self.__display.show_error('The following song could not be exported ({}): \'{}\''
+                                      .format(error.strerror or error, collection_path_song))
+            stage = 'failed'
+        else:
+            self.__add_exported_song(collection_path_song, exportation_path_song)
+            stage = 'encoded' if self.__exportation_format == 'mp3' else 'copied'
+        self.__progress.update(stage, size)
+        self.__show_exported_song(collection_path_song, exportation_path_song, stage)
+
+    def __show_exported_song(self, collection_path_song, exportation_path_song, status):
+        """Write the record of a song that went through the exportation.
 
         :param str collection_path_song: full path of the song in the music collection.
         :param str exportation_path_song: full path of the song in the exportation directory.
-        :param int cnt: counter for current song.
-        :param int total_playlists_songs: total of songs to export.
+        :param str status: what happened to the song ('encoded', 'copied', 'skipped' or 'failed').
         """
-        try:
-            tag = tinytag.TinyTag.get(collection_path_song)
-            tag_title = tag.title
-            tag_artist = tag.albumartist
-            tag_album = tag.album
-            self.__display.show_validation('Successfully exported ({}/{}): \'{}\' from \'{}\' in \'{}\''
-                                           .format(cnt, total_playlists_songs, tag_title, tag_artist, tag_album))
-        except tinytag.TinyTagException:
-            exported_song_name = exportation_path_song.rsplit('/', 1)[1]
-            exported_album_name = exportation_path_song.rsplit('/', 1)[0]
-            exported_album_name = exported_album_name.rsplit('/', 1)[1] + '/'
-            self.__display.show_validation('Successfully exported ({}/{}): \'{}\' in \'{}\''
-                                           .format(cnt, total_playlists_songs, exported_song_name, exported_album_name))
+        self.__display.show_record({'type': 'song', 'source': collection_path_song,
+                                    'destination': exportation_path_song, 'status': status})
 
     def __export_playlists(self):
         """Export the playlists that in the music collection. First get the path where the playlists will be exported.
         Then create the directory for the exportation. Create all the parent directories if necessary and finally
-        copy the playlists in the exportation directory, while preserving the playlist OS metadata (e.g. date, etc.).
+        write the playlists in the exportation directory, in the playlists format selected in the Preferences.
         """
         exportation_path_playlists = self.__prefs.get_exportation_path_playlists()
         pathlib.Path(exportation_path_playlists).mkdir(parents=True, exist_ok=True)
@@ -199,13 +309,60 @@ class Exporter(object):
 
         collection_paths_playlists = self.__play.get_playlists_paths()
         for collection_playlist in collection_paths_playlists:
+            name = os.path.splitext(collection_playlist.rsplit('/', 1)[1])[0]
+            exportation_playlist = os.path.join(exportation_path_playlists,
+                                                '{}.{}'.format(name, self.__exportation_playlists_format))
             try:
-                shutil.copy2(collection_playlist, exportation_path_playlists)
+                self.__write_playlist(collection_playlist, exportation_playlist)
                 self.__show_exported_playlist(collection_playlist)
+                self.__display.show_record({'type': 'playlist', 'source': collection_playlist,
+                                            'destination': exportation_playlist})
             except FileNotFoundError as f:
                 self.__display.show_error('The following playlist was not found: \'{}\'\nPlease ensure that this '
                                           'playlist is in your music collection and try again.\n'.format(f.filename))
 
+    def __write_playlist(self, collection_playlist, exportation_playlist):
+        """Write an exported playlist in a single pass over the playlist of the music collection. The entries point at
+        the songs with the extension of the exportation format, and each of them is preceded by an '#EXTINF' line with
+        the duration and the title of the song, taken from the metadata gathered for the exportation, so that players
+        do not have to read every song to display the playlist. The directives of the original playlist are replaced by
+        the new ones. The playlist is written in a temporary file first, so that an interrupted write never leaves a
+        truncated playlist.
+
+        :param str collection_playlist: full path of the playlist in the music collection.
+        :param str exportation_playlist: full path of the playlist in the exportation directory.
+        """
+        try:
+            with open(exportation_playlist + '.tmp', 'w', encoding='utf8') as playlist_file:
+                playlist_file.write('#EXTM3U\n')
+                for _, entry in self.__play.get_playlist_lines(collection_playlist):
+                    collection_path_song = os.path.join(self.__collection_path_root, entry)
+                    tag = self.__tags.get(collection_path_song)
+                    if tag is not None:
+                        playlist_file.write(self.__get_playlist_information(collection_path_song, tag))
+                    if not os.path.isabs(entry) and pathlib.PurePath(entry).suffix == '.flac':
+                        entry = self.__get_exportation_path_song(collection_path_song)[
+                            len(self.__exportation_path_root):]
+                    playlist_file.write(entry + '\n')
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(exportation_playlist + '.tmp')
+            raise
+        os.replace(exportation_playlist + '.tmp', exportation_playlist)
+
+    def __get_playlist_information(self, collection_path_song, tag):
+        """Get the '#EXTINF' line of a song in an exported playlist, with its duration in seconds and its title, along
+        with its album artist if known. If the song has no title, its file name is used instead.
+
+        :param str collection_path_song: full path of the song in the music collection.
+        :param Tag tag: the metadata of the song.
+        :return str line: the '#EXTINF' line of the song.
+        """
+        title = tag.title or pathlib.PurePath(collection_path_song).stem
+        if tag.albumartist:
+            title = '{} - {}'.format(tag.albumartist, title)
+        return '#EXTINF:{},{}\n'.format(round(tag.duration or 0), ' '.join(title.split()))
+
     def __show_exported_playlist(self, collection_playlist):
         """Show the playlist that has been successfully exported.
 
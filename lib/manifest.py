@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import json
+import os
+import pathlib
+
+
+class Manifest(object):
+    def __init__(self, display, preferences):
+        """Initialize the Manifest object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__manifest_name = '.audious-manifest.json'
+        self.__manifest_version = 1
+        self.__manifest_path = None
+        self.__journal_name = '.audious-manifest.journal'
+        self.__journal_path = None
+        self.__journal_file = None
+        self.__exportation_path_root = None
+        self.__songs = {}
+
+    def init(self, exportation_path_root):
+        """Initialize the Manifest object. Load the manifest of a previous exportation if any. The manifest is a hidden
+        file located at the root of the exportation directory. If it was created by a different version of Audious or
+        if it is corrupted, ignore it. Then replay the journal of an interrupted exportation if any.
+
+        :param str exportation_path_root: root path of the playlists exportation.
+        """
+        self.__exportation_path_root = exportation_path_root
+        self.__manifest_path = os.path.join(exportation_path_root, self.__manifest_name)
+        self.__journal_path = os.path.join(exportation_path_root, self.__journal_name)
+        try:
+            with open(self.__manifest_path, 'r') as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get('version') == self.__manifest_version:
+                self.__songs = manifest['songs']
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, AttributeError):
+            self.__display.show_warning('The manifest of the previous exportation is corrupted and will be ignored.')
+        self.__replay_journal()
+
+    def __replay_journal(self):
+        """Replay the journal of an interrupted exportation, which records the songs exported since the manifest was
+        last saved, one per line. A line left half-written by the interruption, or written by a different version of
+        Audious, is ignored.
+        """
+        try:
+            with open(self.__journal_path, 'r') as journal_file:
+                for line in journal_file:
+                    try:
+                        version, key, exported = json.loads(line)
+                    except ValueError:
+                        continue
+                    if version == self.__manifest_version:
+                        self.__songs[key] = exported
+        except FileNotFoundError:
+            pass
+
+    def __get_key(self, exportation_path_song):
+        """Get the key of an exported song in the manifest, which is its path relative to the exportation directory.
+
+        :param str exportation_path_song: full path of the song in the exportation directory.
+        :return str key: the path of the song relative to the exportation directory.
+        """
+        return os.path.relpath(exportation_path_song, self.__exportation_path_root)
+
+    def is_exported(self, song, exportation_path_song, exportation_format, settings):
+        """Check if a song was already exported with the same format and settings, and did not change since then.
+
+        :param Song song: the song, as found in the music collection.
+        :param str exportation_path_song: full path of the song in the exportation directory.
+        :param str exportation_format: the exportation format.
+        :param str settings: the settings used for the exportation.
+        :return bool exported: True if the song does not need to be exported again.
+        """
+        exported = self.__songs.get(self.__get_key(exportation_path_song))
+        return (exported is not None and exported['source'] == song.path and exported['size'] == song.size and
+                exported['mtime'] == song.mtime and exported['format'] == exportation_format and
+                exported['settings'] == settings and os.path.isfile(exportation_path_song))
+
+    def add(self, song, exportation_path_song, exportation_format, settings):
+        """Record a song that was successfully exported. The song is also appended to the journal, so that an
+        interrupted exportation can be resumed without rewriting the whole manifest after each song.
+
+        :param Song song: the song, as found in the music collection.
+        :param str exportation_path_song: full path of the song in the exportation directory.
+        :param str exportation_format: the exportation format.
+        :param str settings: the settings used for the exportation.
+        """
+        key = self.__get_key(exportation_path_song)
+        self.__songs[key] = {'source': song.path, 'size': song.size, 'mtime': song.mtime,
+                             'format': exportation_format, 'settings': settings}
+        if self.__journal_file is None:
+            self.__journal_file = open(self.__journal_path, 'a')
+        self.__journal_file.write(json.dumps([self.__manifest_version, key, self.__songs[key]]) + '\n')
+        self.__journal_file.flush()
+
+    def remove_missing(self, exportation_paths_songs):
+        """Remove the exported songs that are not in the playlists anymore, as well as the directories left empty.
+        Only the songs recorded in the manifest are removed.
+
+        :param set exportation_paths_songs: full paths of all the songs that should be in the exportation directory.
+        :return list removed: full paths of the songs that were removed.
+        """
+        keys = {self.__get_key(path) for path in exportation_paths_songs}
+        removed = []
+
+        for key in [key for key in self.__songs if key not in keys]:
+            path = pathlib.Path(self.__exportation_path_root, key)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            del self.__songs[key]
+            removed.append(str(path))
+            self.__remove_empty_directories(path.parent)
+
+        self.save()
+        return removed
+
+    def __remove_empty_directories(self, path):
+        """Remove a directory and its parents as long as they are empty, without leaving the exportation directory.
+
+        :param pathlib.Path path: the directory to remove.
+        """
+        root = pathlib.Path(self.__exportation_path_root)
+        while path != root and root in path.parents:
+            try:
+                path.rmdir()
+            except OSError:
+                break
+            path = path.parent
+
+    def save(self):
+        """Save the manifest and compact the journal into it. The manifest is first written in a temporary file and then
+        renamed, so that it is never left half-written; only then is the journal removed.
+        """
+        manifest_path_temporary = self.__manifest_path + '.tmp'
+        with open(manifest_path_temporary, 'w') as manifest_file:
+            json.dump({'version': self.__manifest_version, 'songs': self.__songs}, manifest_file)
+        os.replace(manifest_path_temporary, self.__manifest_path)
+
+        if self.__journal_file is not None:
+            self.__journal_file.close()
+            self.__journal_file = None
+        try:
+            os.remove(self.__journal_path)
+        except FileNotFoundError:
+            pass
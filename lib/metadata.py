@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import collections
+import concurrent.futures
+import os
+import re
+import lib as audiouslib
+
+
+Tag = collections.namedtuple('Tag', ['duration', 'title', 'albumartist', 'album', 'year', 'genre', 'bitrate',
+                                   'samplerate', 'bitdepth'])
+
+
+def parse(path):
+    """Parse the tags of a song. Defined at the module level so that it can be sent to the workers of a process pool.
+    TinyTag is only imported when a song has to be parsed, not when all the metadata is found in the cache.
+
+    :param str path: full path of the song.
+    :return Tag tag: the metadata of the song or None if the song could not be parsed.
+    """
+    import tinytag
+    try:
+        tag = tinytag.TinyTag.get(path)
+    except (tinytag.TinyTagException, OSError):
+        return None
+    year = re.search(r'\d{4}', str(tag.year or ''))
+    return Tag(tag.duration or 0, tag.title, tag.albumartist, tag.album, int(year.group()) if year else 0, tag.genre,
+               tag.bitrate or 0, tag.samplerate or 0, getattr(tag, 'bitdepth', None) or 0)
+
+
+class Metadata(object):
+    def __init__(self, display, preferences):
+        """Initialize the Metadata object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__cache_name = 'metadata.db'
+        self.__cache_version = 2
+        self.__cache_connection = None
+        self.__cache_pending = 0
+        self.__cache_commit_every = 1000
+        self.__workers = None
+        self.__workers_threshold = 64
+
+    def init(self):
+        """Initialize the Metadata object. Open the cache stored in the cache directory and create its table if
+        necessary. If the cache was created by a different version of Audious, drop it and start again from scratch.
+        """
+        if self.__cache_connection is not None:
+            return
+        self.__workers = self.__prefs.get_performance_workers()
+        self.__cache_connection = audiouslib.cache.open_cache(
+            self.__prefs, self.__cache_name, self.__cache_version,
+            {'songs': '(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, duration REAL, title TEXT, '
+                      'albumartist TEXT, album TEXT, year INTEGER, genre TEXT, bitrate REAL, samplerate INTEGER, '
+                      'bitdepth INTEGER)'})
+
+    def get(self, song):
+        """Get the metadata of a song. The song is first looked up in the cache with its size and its last modification
+        time, as found on the disk. If the song is not in the cache or if it was modified since it was cached, parse
+        its tags and update the cache.
+
+        :param Song song: the song, as found in the music collection.
+        :return Tag tag: the metadata of the song.
+        :raise tinytag.TinyTagException: if the song could not be parsed.
+        """
+        song = self.__check(song)
+        tag = self.__lookup(song)
+        if tag is not None:
+            return tag
+
+        with audiouslib.profiler.profiler.phase('tags', size=song.size):
+            tag = parse(song.path)
+        if tag is None:
+            import tinytag
+            raise tinytag.TinyTagException('The following song could not be parsed: \'{}\''.format(song.path))
+        self.__store(song, tag)
+        return tag
+
+    def get_many(self, songs):
+        """Get the metadata of several songs at once. Songs found in the cache are served directly, the other ones are
+        parsed only once, in parallel, by a pool of workers. The number of workers is set in the Preferences. Songs
+        that could not be parsed are reported and ignored.
+
+        :param list songs: the songs, as found in the music collection.
+        :return dict tags: the metadata of the songs, indexed by their full paths.
+        """
+        tags = {}
+        misses = {}
+
+        for song in songs:
+            if song.path in tags or song.path in misses:
+                continue
+            song = self.__check(song)
+            tag = self.__lookup(song)
+            if tag is not None:
+                tags[song.path] = tag
+            else:
+                misses[song.path] = song
+
+        with audiouslib.profiler.profiler.phase('tags', len(misses), sum(song.size for song in misses.values())):
+            parsed = self.__parse_many(list(misses))
+        for song, tag in zip(misses.values(), parsed):
+            if tag is None:
+                self.__display.show_error('The following song could not be parsed and will be ignored: '
+                                          '\'{}\''.format(song.path))
+            else:
+                self.__store(song, tag)
+                tags[song.path] = tag
+
+        return tags
+
+    def __parse_many(self, paths):
+        """Parse the tags of several songs. Use a process pool when there are enough songs to parse to make it worth
+        it, and parse them one by one otherwise.
+
+        :param list paths: full paths of the songs.
+        :return list tags: the metadata of the songs, in the same order as the paths.
+        """
+        if self.__workers <= 1 or len(paths) < self.__workers_threshold:
+            return list(map(parse, paths))
+
+        chunksize = max(1, len(paths) // (self.__workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.__workers) as executor:
+            return list(executor.map(parse, paths, chunksize=chunksize))
+
+    def __check(self, song):
+        """Check again the size and the last modification time of a song on the disk. The scan of the music collection
+        reuses the listing of the directories that did not change, but a song whose tags were edited in place does not
+        change the last modification time of its directory.
+
+        :param Song song: the song, as found in the music collection.
+        :return Song song: the song, with its current size and last modification time if it could be checked.
+        """
+        try:
+            with audiouslib.profiler.profiler.phase('stat'):
+                stat = os.stat(song.path)
+        except OSError:
+            return song
+        if stat.st_size == song.size and stat.st_mtime_ns == song.mtime:
+            return song
+        return song._replace(size=stat.st_size, mtime=stat.st_mtime_ns)
+
+    def __lookup(self, song):
+        """Look up a song in the cache.
+
+        :param Song song: the song, as found in the music collection.
+        :return Tag tag: the cached metadata of the song or None if not cached or outdated.
+        """
+        with audiouslib.profiler.profiler.phase('cache'):
+            row = self.__cache_connection.execute('SELECT size, mtime, duration, title, albumartist, album, year, '
+                                                  'genre, bitrate, samplerate, bitdepth FROM songs WHERE path = ?',
+                                                  (song.path,)).fetchone()
+        if row is not None and row[0] == song.size and row[1] == song.mtime:
+            return Tag(*row[2:])
+        return None
+
+    def __store(self, song, tag):
+        """Store the metadata of a song in the cache. Regularly write the changes to the disk.
+
+        :param Song song: the song, as found in the music collection.
+        :param Tag tag: the metadata of the song.
+        """
+        self.__cache_connection.execute('INSERT OR REPLACE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                        (song.path, song.size, song.mtime) + tuple(tag))
+        self.__cache_pending += 1
+        if self.__cache_pending >= self.__cache_commit_every:
+            self.save()
+
+    def save(self):
+        """Write the pending changes of the cache to the disk."""
+        if self.__cache_connection is not None:
+            self.__cache_connection.commit()
+            self.__cache_pending = 0
+
+    def close(self):
+        """Save the cache and close it."""
+        if self.__cache_connection is not None:
+            self.save()
+            self.__cache_connection.close()
+            self.__cache_connection = None
@@ -4,27 +4,36 @@ import lib as audiouslib
 
 
 class Picker(object):
-    def __init__(self, display, preferences, collection):
-        """Initialize the Picker object internally."""
+    def __init__(self, display, preferences, collection, playlists=None):
+        """Initialize the Picker object internally. The playlists can be shared with other objects, so that they are
+        parsed only once.
+        """
         self.__display = display
         self.__prefs = preferences
         self.__coll = collection
-        self.__play = audiouslib.playlists.Playlists(display, preferences)
+        self.__play = playlists or audiouslib.playlists.Playlists(display, preferences)
 
         self.__collection_paths_music_categories = None
         self.__collection_prefixes_music_categories = None
+        self.__collection_prefixes_regex = None
         self.__playlists_albums = None
         self.__total_albums_collection = 0
         self.__total_albums_playlists = 0
         self.__total_albums_picked = 0
     
     def init(self):
-        """Initialize the Picker object. Get the paths of the music collection categories and their prefixes."""
+        """Initialize the Picker object. Get the paths of the music collection categories and their prefixes. Also
+        compile once a regex matching any of the prefixes at the beginning of an album; the longest prefixes are tried
+        first so that nested categories are properly resolved.
+        """
         self.__play.init()
         self.__coll.init()
         self.__collection_paths_music_categories = self.__prefs.get_collection_paths_music_categories()
         self.__collection_prefixes_music_categories = self.__prefs.get_collection_prefixes_music_categories()
 
+        prefixes = sorted(self.__collection_prefixes_music_categories, key=len, reverse=True)
+        self.__collection_prefixes_regex = re.compile('^(?:{})'.format('|'.join(map(re.escape, prefixes))))
+
     def pick_albums(self):
         """Pick the albums that are not in playlists. Then, for each music collection category:
           * First, get the albums of the category
@@ -36,14 +45,16 @@ class Picker(object):
         """
         self.get_playlists_albums()
 
-        for category, path in self.__collection_paths_music_categories.items():
-            category_albums = self.__get_category_albums(category, path)
+        for category in self.__collection_paths_music_categories:
+            category_albums = self.__get_category_albums(category)
             category_albums_picked = self.__pick_albums_category(category_albums)
             total_category_albums = len(category_albums)
             total_category_albums_picked = len(category_albums_picked)
 
             self.__show_statistics_category(total_category_albums, total_category_albums_picked)
-            self.__show_picked_albums_category(category_albums_picked)
+            self.__display.show_record({'type': 'category', 'category': category, 'albums': total_category_albums,
+                                        'albums_picked': total_category_albums_picked})
+            self.__show_picked_albums_category(category, category_albums_picked)
             self.__total_albums_collection += total_category_albums
             self.__total_albums_picked += total_category_albums_picked
 
@@ -53,33 +64,28 @@ class Picker(object):
         """Get all the albums that are in the playlists."""
         self.__display.show_substep('Parsing playlists')
         self.__play.show_playlists_total()
-        self.__playlists_albums = self.__play.get_albums()
+        self.__playlists_albums = set(self.__play.get_albums())
 
-    def __get_category_albums(self, category, path):
-        """Get all the albums that are in a music collection category.
+    def __get_category_albums(self, category):
+        """Get all the albums that are in a music collection category, using the music collection model.
 
         :param str category: the music collection category name.
-        :param str path: the path where the music collection category is located.
         :return list category_albums: list of albums contained in a music category.
         """
         self.__display.show_substep('Picking albums to listen in \'{}\''.format(category.title()))
-        category_songs = self.__coll.get_category_songs(category, path)
-        category_albums = self.__coll.get_category_albums(category_songs)
+        self.__coll.show_category_parsing(category)
+        category_albums = self.__coll.get_category_albums(category)
         return category_albums
 
     def __pick_albums_category(self, category_albums):
-        """Pick all the albums not listened in a category. Also sort the albums alphabetically.
+        """Pick all the albums not listened in a category. The albums of the playlists are indexed in a set, so that
+        each album is checked in constant time. Also sort the albums alphabetically.
 
         :param list category_albums: list of albums contained in a music category.
         :return list category_albums_picked: list of albums picked in a music category.
         """
-        category_albums_picked = []
-
-        for album in category_albums:
-            if album not in self.__playlists_albums:
-                category_albums_picked.append(album)
-
-        category_albums_picked = sorted(category_albums_picked, key=str.lower)
+        category_albums_picked = [album for album in category_albums if album not in self.__playlists_albums]
+        category_albums_picked.sort(key=str.lower)
         return category_albums_picked
 
     def __show_statistics_category(self, total_category_albums, total_category_albums_picked):
@@ -122,19 +128,22 @@ class Picker(object):
         pc_picked = 100. - pc_playlists
         self.__display.show_warning('Albums not in the playlists: {} ({:,.2f}%)'
                                     .format(self.__total_albums_picked, pc_picked))
+        self.__display.show_record({'type': 'summary', 'albums': self.__total_albums_collection,
+                                    'albums_playlists': self.__total_albums_playlists,
+                                    'albums_picked': self.__total_albums_picked})
 
-    def __show_picked_albums_category(self, category_albums_picked):
-        """Show the list of albums picked in a music category. First, remove music prefixes and then display the
-        album one by one, using a bitwise operation to alternate the printing of every two albums.
+    def __show_picked_albums_category(self, category, category_albums_picked):
+        """Show the list of albums picked in a music category. First, remove the music prefix with the precompiled
+        regex and then display the album one by one, using a bitwise operation to alternate the printing of every two
+        albums. Also write a record for each album.
 
+        :param str category: the music collection category name.
         :param: list category_albums_picked: list of albums picked in a music category.
         """
-        for album in range(len(category_albums_picked)):
-            for prefix in self.__collection_prefixes_music_categories:
-                category_albums_picked[album] = re.sub(prefix, '', category_albums_picked[album])
-
         cnt = 0
-        for album in category_albums_picked:
+        for album_path in category_albums_picked:
+            album = self.__collection_prefixes_regex.sub('', album_path, count=1)
+            self.__display.show_record({'type': 'album', 'category': category, 'album': album, 'path': album_path})
             album = album.replace('/', ' \u2192 ', 1)
             cnt += 1
             if (cnt & 1) == 0:
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import lib as audiouslib
+
+
+class Pipeline(object):
+    def __init__(self, display, preferences):
+        """Initialize the Pipeline object internally."""
+        self.__display = display
+        self.__prefs = preferences
+        self.__copier = audiouslib.copier.Copier(display, preferences)
+
+        self.__encoders = None
+        self.__prefetch_per_encoder = 2
+        self.__writes_per_encoder = 8
+        self.__timeout = 0.1
+        self.__end = object()
+        self.__stop = None
+
+    def init(self):
+        """Initialize the Pipeline object. Get the number of encoders running at the same time."""
+        self.__encoders = self.__prefs.get_performance_encoders()
+        self.__copier.init()
+
+    def run(self, jobs, encode=None):
+        """Export songs through three stages running at the same time and connected by bounded queues:
+          * Prefetch: ask the kernel to read the upcoming songs in advance from the music collection
+          * Encode: convert the songs with several encoders at the same time in a local temporary directory, or do
+            nothing if the songs are exported as they are
+          * Write-behind: copy the converted songs (or the songs themselves) to the exportation directory, one after
+            the other, with the cheapest method available
+        The queues give backpressure: a stage waits when the next one is too far behind. A slow exportation directory
+        (e.g. SD card, USB stick) does not block the encoders as long as the converted songs waiting to be written fit
+        in the queue. The results are given back in the same order as the jobs.
+
+        :param iterable jobs: the songs to export, as tuples of source and destination full paths.
+        :param func encode: the function converting a song from a source path to a destination path and returning an
+         exit status, or None to export the songs as they are.
+        :return generator results: tuples of source and destination full paths, exit status of the conversion (0 when
+         not converted) and error raised while writing the song (None if successful), in the same order as the jobs.
+        """
+        self.__stop = threading.Event()
+        prefetched = queue.Queue(maxsize=self.__encoders * self.__prefetch_per_encoder)
+        encoded = queue.Queue(maxsize=self.__encoders * self.__writes_per_encoder)
+        written = queue.Queue()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.__encoders)
+        temporary_path = tempfile.mkdtemp(prefix='audious-') if encode is not None else None
+
+        threads = [threading.Thread(target=self.__forward, args=(self.__prefetch, prefetched, jobs)),
+                   threading.Thread(target=self.__forward, args=(self.__encode, encoded, prefetched, executor, encode,
+                                                                 temporary_path)),
+                   threading.Thread(target=self.__forward, args=(self.__write, written, encoded))]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                result = written.get()
+                if result is self.__end:
+                    break
+                if isinstance(result, BaseException):
+                    raise result
+                yield result
+        finally:
+            self.__stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for thread in threads:
+                thread.join()
+            executor.shutdown(wait=True)
+            if temporary_path is not None:
+                shutil.rmtree(temporary_path, ignore_errors=True)
+
+    def __forward(self, stage, output, *args):
+        """Run a stage in its own thread. An unexpected error is forwarded down the pipeline, so that it is raised again
+        in the main thread.
+
+        :param func stage: the stage to run.
+        :param queue.Queue output: the output queue of the stage.
+        :param tuple args: the other arguments of the stage.
+        """
+        try:
+            stage(*args, output)
+        except BaseException as e:
+            self.__put(output, e)
+
+    def __put(self, output, item):
+        """Put an item in a bounded queue, waiting for some room unless the pipeline is stopped.
+
+        :param queue.Queue output: the queue.
+        :param object item: the item.
+        :return bool put: True if the item was put in the queue, False if the pipeline was stopped.
+        """
+        while not self.__stop.is_set():
+            try:
+                output.put(item, timeout=self.__timeout)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __get(self, source):
+        """Get an item from a queue, waiting for one unless the pipeline is stopped.
+
+        :param queue.Queue source: the queue.
+        :return object item: the item, or the end of the pipeline if it was stopped.
+        """
+        while not self.__stop.is_set():
+            try:
+                return source.get(timeout=self.__timeout)
+            except queue.Empty:
+                continue
+        return self.__end
+
+    def __prefetch(self, jobs, prefetched):
+        """Prefetch stage: ask the kernel to start reading each song in the background, so that the song is already in
+        memory when it is encoded or copied.
+
+        :param iterable jobs: the songs to export, as tuples of source and destination full paths.
+        :param queue.Queue prefetched: the output queue.
+        """
+        for job in jobs:
+            with audiouslib.profiler.profiler.phase('prefetch'):
+                self.__advise(job[0])
+            if not self.__put(prefetched, job):
+                return
+        self.__put(prefetched, self.__end)
+
+    def __advise(self, path):
+        """Tell the kernel that a file will be read soon. Ignore the platforms and the files that do not support it.
+
+        :param str path: full path of the file.
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __encode(self, prefetched, executor, encode, temporary_path, encoded):
+        """Encode stage: submit each song to the pool of encoders, which converts it in the temporary directory. The
+        pending conversions are passed to the next stage in order, without waiting for them to finish.
+
+        :param queue.Queue prefetched: the input queue.
+        :param concurrent.futures.Executor executor: the pool of encoders.
+        :param func encode: the function converting a song, or None to export the songs as they are.
+        :param str temporary_path: the temporary directory.
+        :param queue.Queue encoded: the output queue.
+        """
+        index = 0
+        while True:
+            job = self.__get(prefetched)
+            if job is self.__end:
+                break
+            if isinstance(job, BaseException):
+                self.__put(encoded, job)
+                return
+            if encode is None:
+                item = (job, None, None)
+            else:
+                index += 1
+                temporary = os.path.join(temporary_path, '{}{}'.format(index, os.path.splitext(job[1])[1]))
+                item = (job, temporary, executor.submit(encode, job[0], temporary))
+            if not self.__put(encoded, item):
+                return
+        self.__put(encoded, self.__end)
+
+    def __write(self, encoded, written):
+        """Write-behind stage: wait for each conversion in order and write the converted song to the exportation
+        directory, then remove it from the temporary directory. The songs that are not converted are directly copied.
+
+        :param queue.Queue encoded: the input queue.
+        :param queue.Queue written: the output queue.
+        """
+        while True:
+            item = self.__get(encoded)
+            if item is self.__end:
+                break
+            if isinstance(item, BaseException):
+                self.__put(written, item)
+                return
+            (source, destination), temporary, future = item
+            status = future.result() if future is not None else 0
+            error = None
+            if status == 0:
+                try:
+                    with audiouslib.profiler.profiler.phase('write'):
+                        self.__copier.copy(temporary or source, destination)
+                except OSError as e:
+                    error = e
+            if temporary is not None:
+                try:
+                    os.remove(temporary)
+                except FileNotFoundError:
+                    pass
+            if not self.__put(written, (source, destination, status, error)):
+                return
+        self.__put(written, self.__end)
@@ -1,107 +1,257 @@
 #!/usr/bin/env python3
 import os
-import re
 import sys
+import lib as audiouslib
 
 
-class Playlists(object):
+class PlaylistSet(object):
     def __init__(self, display, preferences):
-        """Initialize the Playlists object internally."""
+        """Initialize the PlaylistSet object internally."""
         self.__display = display
         self.__prefs = preferences
+        self.__walker = audiouslib.walker.Walker(display, preferences)
 
         self.__collection_path_root = None
         self.__collection_path_playlists = None
-        self.__total_albums = 0
+        self.__playlists = None
+        self.__cache_name = 'playlists.db'
+        self.__cache_version = 2
+        self.__extensions = ('.m3u', '.m3u8')
 
     def init(self):
-        """Initialize the Playlists object."""
+        """Initialize the PlaylistSet object."""
         self.__collection_path_root = self.__prefs.get_collection_path_root()
         self.__collection_path_playlists = self.__prefs.get_collection_path_playlists()
+        self.__walker.init()
 
-    def get_songs(self):
-        """Open recursively all the playlists. Get all the songs that are in the playlists. Also remove all the
-        duplicates.
+    def load(self):
+        """Discover all the playlists and parse each of them only once. Each playlist that changed since the last run
+        is parsed one line at a time, straight into the cache, which then serves the entries of all the playlists for
+        all the songs and albums. Only the status of each playlist is kept in memory, so that the memory used does not
+        depend on the number of entries.
 
-        :return list playlists_songs: list of all songs available in the playlists.
+        :return dict self.__playlists: the identifier in the cache, the size and the last modification time of each
+         playlist, indexed by the full path of the playlist.
         """
-        playlists_paths = self.get_playlists_paths()
-        playlists_songs = []
+        if self.__playlists is not None:
+            return self.__playlists
 
-        for playlist in playlists_paths:
-            songs = self.__get_playlist_songs(playlist)
-            for song in songs:
-                playlists_songs.append(song)
-        playlists_songs = list(set(playlists_songs))
-        return playlists_songs
+        connection = self.__open_cache()
+        self.__playlists = {}
+
+        for entry in self.__walker.walk(self.__collection_path_playlists, self.__extensions):
+            # Playlists are often edited in place, so their status is always checked again
+            try:
+                with audiouslib.profiler.profiler.phase('stat'):
+                    stat = os.stat(entry.path)
+            except FileNotFoundError:
+                continue
+            row = connection.execute('SELECT id, size, mtime FROM playlists WHERE path = ?', (entry.path,)).fetchone()
+            if row is None or row[1] != stat.st_size or row[2] != stat.st_mtime_ns:
+                with audiouslib.profiler.profiler.phase('playlists', size=stat.st_size):
+                    row = self.__store_playlist(connection, row, entry.path, stat)
+            self.__playlists[entry.path] = (row[0], stat.st_size, stat.st_mtime_ns)
+
+        connection.close()
+        return self.__playlists
+
+    def __store_playlist(self, connection, row, path, stat):
+        """Parse a playlist one line at a time and store its entries in the cache, in place of the previous ones.
+
+        :param sqlite3.Connection connection: the connection to the cache.
+        :param tuple row: the identifier, the size and the last modification time of the playlist in the cache, or
+         None if the playlist is not in the cache yet.
+        :param str path: full path of the playlist.
+        :param os.stat_result stat: the status of the playlist.
+        :return tuple row: the identifier, the size and the last modification time of the playlist in the cache.
+        """
+        with connection:
+            if row is None:
+                identifier = connection.execute('INSERT INTO playlists (path, size, mtime) VALUES (?, ?, ?)',
+                                                (path, stat.st_size, stat.st_mtime_ns)).lastrowid
+            else:
+                identifier = row[0]
+                connection.execute('UPDATE playlists SET size = ?, mtime = ? WHERE id = ?',
+                                   (stat.st_size, stat.st_mtime_ns, identifier))
+                connection.execute('DELETE FROM entries WHERE playlist = ?', (identifier,))
+            connection.executemany('INSERT INTO entries VALUES (?, ?, ?)',
+                                   ((identifier, position, entry)
+                                    for position, (_, entry) in enumerate(self.get_playlist_lines(path))))
+        return identifier, stat.st_size, stat.st_mtime_ns
+
+    def __get_entries(self, paths):
+        """Read the entries of playlists from the cache, one at a time.
+
+        :param list paths: full paths of the playlists.
+        :return generator entries: the entries of the playlists, in order and with their duplicates, relative to the
+         music collection.
+        """
+        playlists = self.load()
+        connection = self.__open_cache()
+        try:
+            for path in paths:
+                for entry, in connection.execute('SELECT entry FROM entries WHERE playlist = ? ORDER BY position',
+                                                 (playlists[path][0],)):
+                    yield entry
+        finally:
+            connection.close()
+
+    def refresh(self):
+        """Load again the playlists, so that the changes made since the previous load are taken into account. Only the
+        playlists that changed are parsed again.
+
+        :return bool changed: True if playlists were added, removed or modified since the previous load.
+        """
+        playlists = self.__playlists
+        self.__playlists = None
+        return self.load() != playlists
 
-    def __get_playlist_songs(self, path):
-        """Open a playlist and get a list of all the songs contained in this playlist. Remove blank lines as well as
-        the leading and trailing characters in a line. Then concatenate the song with its full path.
+    def __open_cache(self):
+        """Open the cache of the playlists stored in the cache directory.
 
-        :param str path: full path of a playlist
-        :return list albums: list of songs contained in a playlist
+        :return sqlite3.Connection connection: the connection to the cache.
         """
-        songs = []
+        return audiouslib.cache.open_cache(
+            self.__prefs, self.__cache_name, self.__cache_version,
+            {'playlists': '(id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime INTEGER)',
+             'entries': '(playlist INTEGER, position INTEGER, entry TEXT, PRIMARY KEY (playlist, position)) '
+                        'WITHOUT ROWID'})
+
+    def get_playlist_lines(self, path):
+        """Read the entries of a playlist along with their line numbers, one line at a time, so that the memory used
+        does not depend on the size of the playlist. Remove blank lines, the directives of extended playlists (e.g.
+        '#EXTM3U', '#EXTINF') and comments, as well as the leading and trailing characters in a line. Both M3U and
+        M3U8 playlists are read in UTF-8, with or without a byte order mark. The playlist is read from the disk, not
+        from the cache.
 
-        with open(path, 'r', encoding="utf8", errors='ignore') as playlist_file:
-            for line in playlist_file:
+        :param str path: full path of a playlist.
+        :return generator lines: tuples of line number (starting at 1) and entry, relative to the music collection.
+        """
+        directory = os.path.dirname(path)
+        with open(path, 'r', encoding='utf-8-sig', errors='ignore') as playlist_file:
+            for number, line in enumerate(playlist_file, 1):
                 line = line.strip()
-                if line:
-                    songs.append(self.__collection_path_root + line)
+                if not line or line[0] == '#':
+                    continue
+                if line[0] in './':
+                    line = self.__get_entry(directory, line)
+                yield number, line
 
-        return songs
+    def __get_entry(self, directory, line):
+        """Get the entry of a line of a playlist that is not relative to the music collection, as most entries are.
+        Absolute entries in the music collection and entries relative to the playlist (starting with './' or '../') are
+        converted to entries relative to the music collection. Entries outside of the music collection are kept
+        absolute.
+
+        :param str directory: full path of the directory of the playlist.
+        :param str line: the line of the playlist.
+        :return str entry: the entry, relative to the music collection if possible.
+        """
+        if line.startswith(('./', '../')):
+            line = os.path.normpath(os.path.join(directory, line))
+        if line.startswith(self.__collection_path_root):
+            line = line[len(self.__collection_path_root):]
+        return line
+
+    def get_paths(self):
+        """Get all the paths of all the playlists.
+
+        :return list paths: a list containing all playlists with full paths.
+        """
+        return list(self.load())
+
+    def get_playlist_songs(self, path):
+        """Get the songs of a playlist, concatenated with their full path, one at a time. The entries outside of the
+        music collection are already absolute and are kept as they are.
+
+        :param str path: full path of a playlist.
+        :return generator songs: the songs contained in a playlist, in order and with their duplicates.
+        """
+        return (os.path.join(self.__collection_path_root, entry) for entry in self.__get_entries([path]))
+
+    def get_songs(self):
+        """Get all the songs that are in the playlists, concatenated with their full path. The entries outside of the
+        music collection are already absolute and are kept as they are. Also remove all the duplicates.
+
+        :return list songs: list of all songs available in the playlists.
+        """
+        entries = dict.fromkeys(self.__get_entries(self.get_paths()))
+        return [os.path.join(self.__collection_path_root, entry) for entry in entries]
 
     def get_albums(self):
-        """Open recursively all the playlists and get all the albums that are in the playlists. Also remove all the
-        duplicates, increment the total of albums found in the playlists, and check the presence of at least one
-        album.
+        """Get all the albums that are in the playlists. Also remove all the duplicates.
 
-        :return list playlists_albums: list of all albums available in the playlists.
+        :return list albums: list of all albums available in the playlists.
         """
-        playlists_paths = self.get_playlists_paths()
-        playlists_albums = []
+        entries = dict.fromkeys(self.__get_entries(self.get_paths()))
+        return list(dict.fromkeys(entry.rsplit('/', 1)[0] for entry in entries))
 
-        for playlist in playlists_paths:
-            albums = self.__get_playlist_albums(playlist)
-            for album in albums:
-                playlists_albums.append(album)
 
-        playlists_albums = list(set(playlists_albums))
-        self.__total_albums = len(playlists_albums)
-        self.__check_total_albums()
+class Playlists(object):
+    def __init__(self, display, preferences):
+        """Initialize the Playlists object internally."""
+        self.__display = display
+        self.__prefs = preferences
+        self.__playlist_set = PlaylistSet(display, preferences)
 
-        return playlists_albums
+        self.__total_albums = 0
 
-    def __get_playlist_albums(self, path):
-        """Open a playlist and get a list of all the albums contained in a playlist. Remove blank lines as well as the
-        leading and trailing characters in a line. Also remove all the duplicates.
+    def init(self):
+        """Initialize the Playlists object."""
+        self.__playlist_set.init()
+
+    def get_songs(self):
+        """Get all the songs that are in the playlists, which are parsed only once. Also remove all the duplicates.
 
-        :param str path: full path of a playlist
-        :return list albums: list of albums contained in a playlist
+        :return list playlists_songs: list of all songs available in the playlists.
         """
-        albums = []
+        self.get_playlists_paths()
+        playlists_songs = self.__playlist_set.get_songs()
+        return playlists_songs
 
-        with open(path, 'r', encoding="utf8", errors='ignore') as playlist_file:
-            for line in playlist_file:
-                line = line.strip()
-                if line:
-                    albums.append(line.rsplit('/', 1)[0])
+    def refresh(self):
+        """Load again the playlists, so that the changes made since the previous load are taken into account.
+
+        :return bool changed: True if playlists were added, removed or modified since the previous load.
+        """
+        return self.__playlist_set.refresh()
 
-        return albums
+    def get_playlist_songs(self, path):
+        """Get all the songs that are in a playlist, one at a time.
 
-    def get_playlists_paths(self):
-        """Get all the paths of all the playlists. Select only .m3u files with a regex. Check the presence of at least
-        one playlist.
+        :param str path: full path of a playlist.
+        :return generator playlist_songs: the songs contained in a playlist.
+        """
+        return self.__playlist_set.get_playlist_songs(path)
 
-        :return list paths: a list containing all playlists with full paths.
+    def get_playlist_lines(self, path):
+        """Get the entries of a playlist along with their line numbers.
+
+        :param str path: full path of a playlist.
+        :return generator lines: tuples of line number and entry, relative to the music collection.
         """
-        regex = re.compile(r'\.(m3u)$')
-        paths = []
+        return self.__playlist_set.get_playlist_lines(path)
 
-        for path, dnames, fnames in os.walk(self.__collection_path_playlists):
-            paths.extend([os.path.join(path, x) for x in fnames if regex.search(x)])
+    def get_albums(self):
+        """Get all the albums that are in the playlists, which are parsed only once. Also remove all the duplicates,
+        increment the total of albums found in the playlists, and check the presence of at least one album.
 
+        :return list playlists_albums: list of all albums available in the playlists.
+        """
+        self.get_playlists_paths()
+        playlists_albums = self.__playlist_set.get_albums()
+        self.__total_albums = len(playlists_albums)
+        self.__check_total_albums()
+
+        return playlists_albums
+
+    def get_playlists_paths(self):
+        """Get all the paths of all the playlists, which are discovered only once. Check the presence of at least one
+        playlist.
+
+        :return list paths: a list containing all playlists with full paths.
+        """
+        paths = self.__playlist_set.get_paths()
         self.__check_total_playlists(len(paths))
         return paths
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import json
+import os
 import pathlib
 import sys
 
@@ -8,6 +9,8 @@ class Preferences(object):
     def __init__(self, display):
         """Initialize the Preferences object internally."""
         self.__prefs_path = './preferences/preferences.json'
+        self.__cache_path = './cache/'
+        self.__sanitization_path = None
         self.__display = display
         self.__load_and_check()
 
@@ -30,6 +33,17 @@ class Preferences(object):
         self.__prefs_data_exportation_root = self.__validate_key('root', self.__prefs_data_exportation)
         self.__prefs_data_exportation_playlists = self.__validate_key('playlists', self.__prefs_data_exportation)
         self.__prefs_data_exportation_format = self.__validate_key('format', self.__prefs_data_exportation)
+        self.__prefs_data_exportation_playlists_format = self.__get_optional_key('playlists_format',
+                                                                                 self.__prefs_data_exportation, 'm3u')
+        self.__prefs_data_exportation_sync = self.__get_optional_key('sync', self.__prefs_data_exportation, False)
+        self.__prefs_data_exportation_hardlinks = self.__get_optional_key('hardlinks', self.__prefs_data_exportation,
+                                                                          False)
+        self.__prefs_data_performance = self.__get_optional_key('performance', self.__prefs_data, {})
+        self.__prefs_data_performance_workers = self.__get_optional_key('workers', self.__prefs_data_performance, 0)
+        self.__prefs_data_performance_encoders = self.__get_optional_key('encoders', self.__prefs_data_performance, 0)
+        self.__prefs_data_daemon = self.__get_optional_key('daemon', self.__prefs_data, {})
+        self.__prefs_data_daemon_socket = self.__get_optional_key('socket', self.__prefs_data_daemon, '')
+        self.__prefs_data_daemon_interval = self.__get_optional_key('interval', self.__prefs_data_daemon, 10)
         self.__check_presence_collection_music_categories()
 
     def __validate_key(self, key, data):
@@ -47,6 +61,16 @@ class Preferences(object):
                                       'provided in the Preferences and try again.'.format(e))
             sys.exit(1)
 
+    def __get_optional_key(self, key, data, default):
+        """Get an optional key from the Preferences. If the key is not present, use a default value instead.
+
+        :param str key: the JSON key to get.
+        :param str data: the JSON string to parse.
+        :param default: the value to use if the key is not present.
+        :return: the value of the key or the default value.
+        """
+        return data.get(key, default)
+
     def __check_presence_collection_music_categories(self):
         """Check the presence of at least one music category. If none found, generate an error and leave the program."""
         if (len(self.__prefs_data_collection_music)) == 0:
@@ -109,23 +133,144 @@ class Preferences(object):
 
         return music_prefixes
 
+    def __validate_performance_number(self, name, number):
+        """Validate a number used to tune the performance. If set to 0, use as many as there are CPUs. If invalid,
+        generate an error and leave the program.
+
+        :param str name: the name of what is counted (e.g. workers).
+        :param int number: the number to validate.
+        :return int number: the validated number.
+        """
+        if not isinstance(number, int) or isinstance(number, bool) or number < 0:
+            self.__display.show_error('The provided number of {} (\'{}\') is not valid. Please provide a positive '
+                                      'number or 0 to use all the CPUs, modify the Preferences and try again.'
+                                      .format(name, number))
+            sys.exit(1)
+        elif number == 0:
+            return os.cpu_count() or 1
+        else:
+            return number
+
+    def get_performance_workers(self):
+        """Check and get the number of workers used to parallelize the heavy operations (e.g. metadata parsing). If
+        set to 0, use as many workers as there are CPUs.
+
+        :return int workers: number of workers or, if invalid, generate an error and leave the program.
+        """
+        return self.__validate_performance_number('workers', self.__prefs_data_performance_workers)
+
+    def get_performance_encoders(self):
+        """Check and get the number of encoders running at the same time during an MP3 exportation. If set to 0, use as
+        many encoders as there are CPUs.
+
+        :return int encoders: number of encoders or, if invalid, generate an error and leave the program.
+        """
+        return self.__validate_performance_number('encoders', self.__prefs_data_performance_encoders)
+
+    def set_performance_encoders(self, encoders):
+        """Override the number of encoders set in the Preferences (e.g. from the command line).
+
+        :param int encoders: number of encoders, 0 to use as many encoders as there are CPUs.
+        """
+        self.__prefs_data_performance_encoders = encoders
+
+    def get_cache_path(self):
+        """Get the path of the directory where are stored the caches. Create the directory if necessary.
+
+        :return str path: path of the caches.
+        """
+        path = self.__cache_path
+        pathlib.Path(path).mkdir(parents=True, exist_ok=True)
+        return path
+
+    def get_daemon_socket(self):
+        """Get the path of the Unix socket on which the daemon answers the queries. If not set, the socket is created
+        in the cache directory.
+
+        :return str path: path of the Unix socket.
+        """
+        if self.__prefs_data_daemon_socket:
+            return os.path.expanduser(self.__prefs_data_daemon_socket)
+        return os.path.join(self.get_cache_path(), 'audious.sock')
+
+    def get_daemon_interval(self):
+        """Check and get the interval, in seconds, between two checks of the changes in the music collection and the
+        playlists made by the daemon.
+
+        :return float interval: the interval in seconds or, if invalid, generate an error and leave the program.
+        """
+        interval = self.__prefs_data_daemon_interval
+        if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+            self.__display.show_error('The provided daemon interval (\'{}\') is not valid. Please provide a positive '
+                                      'number of seconds, modify the Preferences and try again.'.format(interval))
+            sys.exit(1)
+        return interval
+
+    def get_sanitization_path(self):
+        """Get the path of the directory where the sanitized playlists are written.
+
+        :return str path: path of the sanitized playlists, or None if they are not written.
+        """
+        return self.__sanitization_path
+
+    def set_sanitization_path(self, path):
+        """Set the path of the directory where the sanitized playlists are written (e.g. from the command line). Create
+        the directory if necessary. The directory must not be the one of the playlists, so that the original playlists
+        are never overwritten. If so, generate an error and leave the program.
+
+        :param str path: path of the sanitized playlists.
+        """
+        path = os.path.join(os.path.abspath(os.path.expanduser(path)), '')
+        if path == os.path.join(os.path.abspath(self.get_collection_path_playlists()), ''):
+            self.__display.show_error('The sanitized playlists cannot be written in the directory of the playlists. '
+                                      'Please provide another directory and try again.')
+            sys.exit(1)
+        pathlib.Path(path).mkdir(parents=True, exist_ok=True)
+        self.__sanitization_path = path
+
     def get_exportation_path_root(self):
-        """Validate and get the root path of the playlists exportation. Also check that the directory is empty without
-        including hidden files.
+        """Validate and get the root path of the playlists exportation. Unless the exportation is synchronized with a
+        previous one, also check that the directory is empty without including hidden files.
 
         :return str path: root path of the playlists exportation or generate an error and leave the program.
         """
         path = self.__prefs_data_exportation_root
         self.__validate_path(path)
+        if self.get_exportation_sync():
+            return path
 
         visible_files = [file for file in pathlib.Path(path).iterdir() if not file.name.startswith('.')]
         if len(visible_files) != 0:
             self.__display.show_error('The directory used for the exportation is not empty. Please remove all the '
-                                      'files in this directory and try again.')
+                                      'files in this directory, or use the \'--sync\' option to update a previous '
+                                      'exportation, and try again.')
             sys.exit(1)
         else:
             return path
 
+    def get_exportation_sync(self):
+        """Get whether the exportation is synchronized with a previous one, only exporting the songs that are new or
+        that changed.
+
+        :return bool self.__prefs_data_exportation_sync: True if the exportation is synchronized.
+        """
+        return bool(self.__prefs_data_exportation_sync)
+
+    def get_exportation_hardlinks(self):
+        """Get whether the songs exported in FLAC can be hard links to the songs of the music collection, when both are
+        on the same file system.
+
+        :return bool self.__prefs_data_exportation_hardlinks: True if hard links can be used.
+        """
+        return bool(self.__prefs_data_exportation_hardlinks)
+
+    def set_exportation_sync(self, sync):
+        """Override the synchronization of the exportation set in the Preferences (e.g. from the command line).
+
+        :param bool sync: True to synchronize the exportation with a previous one.
+        """
+        self.__prefs_data_exportation_sync = sync
+
     def get_exportation_path_playlists(self):
         """Get the path of the directory where will be stored the playlists during the exportation.
 
@@ -147,3 +292,17 @@ class Preferences(object):
             sys.exit(1)
         else:
             return self.__prefs_data_exportation_format
+
+    def get_exportation_playlists_format(self):
+        """Check and get the format of the exported playlists.
+
+        :return str self.__prefs_data_exportation_playlists_format: preferred format of the exported playlists or, if
+         invalid, generate an error and leave the program.
+        """
+        if self.__prefs_data_exportation_playlists_format not in ('m3u', 'm3u8'):
+            self.__display.show_error('The provided playlists format (\'{}\') is not valid. Only \'m3u\' and \'m3u8\' '
+                                      'formats are supported. Please modify the Preferences and try again.'
+                                      .format(self.__prefs_data_exportation_playlists_format))
+            sys.exit(1)
+        else:
+            return self.__prefs_data_exportation_playlists_format
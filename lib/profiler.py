@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import contextlib
+import io
+import json
+import threading
+import time
+
+
+class Profiler(object):
+    def __init__(self):
+        """Initialize the Profiler object internally. The Profiler is disabled until it is explicitly enabled, in which
+        case recording a phase costs almost nothing.
+        """
+        self.__enabled = False
+        self.__lock = threading.Lock()
+        self.__phases = {}
+        self.__start = None
+        self.__cprofile = None
+        self.__cprofile_functions = 0
+
+    def enable(self, functions=0):
+        """Enable the Profiler. Optionally, also profile all the function calls with cProfile, which is only imported
+        in this case.
+
+        :param int functions: the number of hottest functions to report, 0 not to use cProfile.
+        """
+        self.__enabled = True
+        self.__start = time.perf_counter()
+        if functions > 0:
+            import cProfile
+            self.__cprofile_functions = functions
+            self.__cprofile = cProfile.Profile()
+            self.__cprofile.enable()
+
+    def is_enabled(self):
+        """Check if the Profiler is enabled.
+
+        :return bool self.__enabled: True if the Profiler is enabled.
+        """
+        return self.__enabled
+
+    @contextlib.contextmanager
+    def phase(self, name, count=1, size=0):
+        """Record the wall time spent in a phase (e.g. directory walking, tag reads, FFmpeg, etc.), along with the
+        number of calls and the number of bytes processed.
+
+        :param str name: the name of the phase.
+        :param int count: the number of calls to account for.
+        :param int size: the number of bytes processed.
+        """
+        if not self.__enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, count, size, time.perf_counter() - start)
+
+    def add(self, name, count=1, size=0, duration=0.):
+        """Account for calls and bytes processed in a phase, for instance when they are known only after the phase.
+
+        :param str name: the name of the phase.
+        :param int count: the number of calls to account for.
+        :param int size: the number of bytes processed.
+        :param float duration: the wall time spent in seconds.
+        """
+        if not self.__enabled:
+            return
+        with self.__lock:
+            phase = self.__phases.setdefault(name, {'time': 0., 'calls': 0, 'bytes': 0})
+            phase['time'] += duration
+            phase['calls'] += count
+            phase['bytes'] += size
+
+    def report(self, path):
+        """Write the report of the Profiler in JSON: the total wall time, the phases and, if enabled, the hottest
+        functions. The raw cProfile statistics are also dumped next to the report.
+
+        :param str path: the path of the JSON report.
+        """
+        if not self.__enabled:
+            return
+        report = {'time': time.perf_counter() - self.__start,
+                  'phases': dict(sorted(self.__phases.items(), key=lambda phase: -phase[1]['time']))}
+
+        if self.__cprofile is not None:
+            import pstats
+            self.__cprofile.disable()
+            self.__cprofile.dump_stats(path + '.prof')
+            stats = pstats.Stats(self.__cprofile, stream=io.StringIO()).sort_stats('cumulative')
+            functions = []
+            for function in stats.fcn_list[:self.__cprofile_functions]:
+                calls, primitive_calls, total_time, cumulative_time, callers = stats.stats[function]
+                functions.append({'function': '{}:{}({})'.format(*function), 'calls': calls,
+                                  'time': total_time, 'cumulative_time': cumulative_time})
+            report['functions'] = functions
+
+        with open(path, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+profiler = Profiler()
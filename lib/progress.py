@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import datetime
+import time
+
+
+class Progress(object):
+    def __init__(self, display, preferences, operation, processed_stages, other_stages):
+        """Initialize the Progress object internally.
+
+        :param str operation: the name of the operation, as shown in the progress (e.g. 'Exported').
+        :param tuple processed_stages: the stages of the songs that were processed (e.g. ('encoded', 'copied')).
+        :param tuple other_stages: the stages of the songs that were not processed (e.g. ('skipped', 'failed')).
+        """
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__operation = operation
+        self.__processed_stages = processed_stages
+        self.__other_stages = other_stages
+        self.__interval = 2.
+        self.__byte_to_megabyte = 1 / (1024 * 1024)
+        self.__stages = processed_stages + other_stages
+        self.__total_songs = 0
+        self.__total_size = 0
+        self.__songs = {}
+        self.__sizes = {}
+        self.__start = None
+        self.__last = None
+
+    def start(self, total_songs, total_size):
+        """Start reporting the progress of an operation processing songs.
+
+        :param int total_songs: total of songs to process, including the ones that will be skipped.
+        :param int total_size: total size in bytes of the songs that will actually be processed.
+        """
+        self.__total_songs = total_songs
+        self.__total_size = total_size
+        self.__songs = dict.fromkeys(self.__stages, 0)
+        self.__sizes = dict.fromkeys(self.__stages, 0)
+        self.__start = self.__last = time.monotonic()
+
+    def update(self, stage, size):
+        """Account for a song that went through a stage. The progress is only shown at a bounded rate, not for every
+        song.
+
+        :param str stage: the stage the song went through, one of the stages given at the initialization.
+        :param int size: the size in bytes of the song in the music collection, or 0 if it was not read.
+        """
+        self.__songs[stage] += 1
+        self.__sizes[stage] += size
+
+        now = time.monotonic()
+        if now - self.__last >= self.__interval:
+            self.__last = now
+            self.__show(now)
+
+    def finish(self):
+        """Show the final progress of the operation."""
+        self.__show(time.monotonic())
+
+    def __show(self, now):
+        """Show the progress: the number of songs processed, the throughput in songs and MegaBytes per second, the
+        split between the stages, and the estimated time remaining.
+
+        :param float now: the current time.
+        """
+        elapsed = max(now - self.__start, 1e-6)
+        done_songs = sum(self.__songs.values())
+        processed_songs = sum(self.__songs[stage] for stage in self.__processed_stages)
+        processed_size = sum(self.__sizes.values())
+        throughput = processed_size / elapsed
+
+        remaining_size = max(self.__total_size - processed_size, 0)
+        eta = remaining_size / throughput if throughput > 0 else 0
+        eta = str(datetime.timedelta(seconds=round(eta)))
+
+        stages = ['{} {} ({:,.1f} MB)'.format(self.__songs[stage], stage, self.__sizes[stage] * self.__byte_to_megabyte)
+                  for stage in self.__processed_stages]
+        stages.extend('{} {}'.format(self.__songs[stage], stage) for stage in self.__other_stages)
+        self.__display.show_progress('{} ({}/{}): {:,.1f} songs/s, {:,.1f} MB/s, {}, ETA: {}'
+                                     .format(self.__operation, done_songs, self.__total_songs,
+                                             processed_songs / elapsed, throughput * self.__byte_to_megabyte,
+                                             ', '.join(stages), eta))
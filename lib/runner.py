@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import lib as audiouslib
+
+
+class Runner(object):
+    def __init__(self, display, preferences, collection, playlists):
+        """Initialize the Runner object internally. The music collection and the playlists are shared by all the
+        actions, so that they are scanned and parsed only once, even when several actions are run.
+        """
+        self.__display = display
+        self.__prefs = preferences
+        self.__coll = collection
+        self.__play = playlists
+
+        self.__actions = {'pick': self.__pick, 'stats': self.__stats, 'sanitize': self.__sanitize,
+                          'verify': self.__verify, 'duplicates': self.__duplicates, 'export': self.__export}
+
+    def run(self, actions):
+        """Run several actions, one after the other, over the same music collection and playlists. The records written
+        by each action are tagged with its name.
+
+        :param list actions: the names of the actions ('pick', 'stats', 'sanitize', 'verify', 'duplicates' or
+         'export').
+        """
+        try:
+            for action in actions:
+                self.__display.set_action(action)
+                self.__actions[action]()
+        finally:
+            self.__display.set_action(None)
+
+    def __pick(self):
+        """Action: pick not listened albums."""
+        self.__display.show_step('Picking albums to listen...')
+        picker = audiouslib.picker.Picker(self.__display, self.__prefs, self.__coll, self.__play)
+        picker.init()
+        picker.pick_albums()
+        self.__display.show_step('Picking albums to listen: done!')
+
+    def __stats(self):
+        """Action: provide music collection statistics."""
+        self.__display.show_step('Providing statistics of the music collection...')
+        stats = audiouslib.statistics.Statistics(self.__display, self.__prefs, self.__coll, self.__play)
+        stats.init()
+        stats.compute()
+        self.__display.show_step('Providing statistics of the music collection: done!')
+
+    def __sanitize(self):
+        """Action: sanitize playlists."""
+        self.__display.show_step('Sanitizing the playlists...')
+        sanitizer = audiouslib.sanitizer.Sanitizer(self.__display, self.__prefs, self.__coll, self.__play)
+        sanitizer.init()
+        sanitizer.sanitize()
+        self.__display.show_step('Sanitizing the playlists: done!')
+
+    def __verify(self):
+        """Action: verify the songs of the music collection."""
+        self.__display.show_step('Verifying the music collection...')
+        verifier = audiouslib.verifier.Verifier(self.__display, self.__prefs, self.__coll)
+        verifier.init()
+        verifier.verify()
+        self.__display.show_step('Verifying the music collection: done!')
+
+    def __duplicates(self):
+        """Action: find the duplicates in the music collection."""
+        self.__display.show_step('Finding the duplicates in the music collection...')
+        deduplicator = audiouslib.deduplicator.Deduplicator(self.__display, self.__prefs, self.__coll)
+        deduplicator.init()
+        deduplicator.find()
+        self.__display.show_step('Finding the duplicates in the music collection: done!')
+
+    def __export(self):
+        """Action: export playlists."""
+        self.__display.show_step('Exporting the playlists...')
+        exporter = audiouslib.exporter.Exporter(self.__display, self.__prefs, self.__coll, self.__play)
+        exporter.init()
+        exporter.export()
+        self.__display.show_step('Exporting the playlists: done!')
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import os
+import pathlib
+import lib as audiouslib
+
+
+class Sanitizer(object):
+    def __init__(self, display, preferences, collection, playlists=None):
+        """Initialize the Sanitizer object internally. The playlists can be shared with other objects, so that they are
+        parsed only once.
+        """
+        self.__display = display
+        self.__prefs = preferences
+        self.__coll = collection
+        self.__play = playlists or audiouslib.playlists.Playlists(display, preferences)
+
+        self.__collection_path_root = None
+        self.__collection_path_playlists = None
+        self.__sanitization_path = None
+        self.__total_entries = 0
+        self.__total_missing = 0
+        self.__total_playlists_missing = 0
+
+    def init(self):
+        """Initialize the Sanitizer object."""
+        self.__play.init()
+        self.__coll.init()
+        self.__collection_path_root = self.__prefs.get_collection_path_root()
+        self.__collection_path_playlists = self.__prefs.get_collection_path_playlists()
+        self.__sanitization_path = self.__prefs.get_sanitization_path()
+
+    def sanitize(self):
+        """Check every entry of every playlist against the music collection model, each entry being a single lookup
+        in the index of the songs built while scanning the music collection, rather than a check on the disk. Report
+        the missing entries per playlist along with their line numbers and, if enabled, write the sanitized playlists.
+        Finally, show a summary.
+        """
+        self.__display.show_substep('Sanitizing playlists')
+        self.__play.show_playlists_total()
+
+        for path in self.__play.get_playlists_paths():
+            total_entries, missing = 0, set()
+            for entry in self.__play.get_playlist_songs(path):
+                total_entries += 1
+                if self.__coll.get_song(entry) is None:
+                    missing.add(entry)
+            self.__total_entries += total_entries
+
+            # The playlist is only read again to get the line numbers when some entries are missing
+            lines_missing = []
+            if missing:
+                lines_missing = [(number, entry) for number, entry in self.__play.get_playlist_lines(path)
+                                 if os.path.join(self.__collection_path_root, entry) in missing]
+            self.__show_playlist(path, total_entries, lines_missing)
+
+            if self.__sanitization_path is not None:
+                self.__write_playlist(path, {number for number, _ in lines_missing})
+
+        self.__show_summary()
+
+    def __show_playlist(self, path, total_entries, lines_missing):
+        """Show the missing entries of a playlist, along with their line numbers.
+
+        :param str path: full path of the playlist.
+        :param int total_entries: the number of entries in the playlist.
+        :param list lines_missing: tuples of line number and missing entry.
+        """
+        name = path.rsplit('/', 1)[1]
+        self.__display.show_record({'type': 'playlist', 'playlist': name, 'entries': total_entries,
+                                    'missing': len(lines_missing)})
+        if not lines_missing:
+            self.__display.show_validation('\'{}\': all the {} songs were found'.format(name, total_entries))
+            return
+
+        self.__total_missing += len(lines_missing)
+        self.__total_playlists_missing += 1
+        self.__display.show_triple(self.__display.show_warning, len(lines_missing),
+                                   '\'{}\': {} songs were not found'.format(name, len(lines_missing)),
+                                   '\'{}\': 1 song was not found'.format(name), '')
+        for number, entry in lines_missing:
+            self.__display.show_error('  line {}: \'{}\''.format(number, entry))
+            self.__display.show_record({'type': 'missing', 'playlist': name, 'line': number, 'entry': entry})
+
+    def __write_playlist(self, path, numbers_missing):
+        """Write a sanitized copy of a playlist, without the lines of the missing entries, nor the '#EXTINF' lines
+        describing them. The copy keeps the layout of the subdirectories of the playlists, so that playlists with the
+        same name never overwrite each other. The entries relative to the playlist (starting with './' or '../') would
+        not resolve anymore from the copy, so they are converted to entries relative to the music collection (or
+        absolute ones, outside of it). The other lines are kept as they are. The copy is written in a temporary file
+        first, so that an interrupted write never leaves a truncated playlist.
+
+        :param str path: full path of the playlist.
+        :param set numbers_missing: the line numbers of the missing entries.
+        """
+        directory = os.path.dirname(path)
+        sanitized_path = os.path.join(self.__sanitization_path, os.path.relpath(path, self.__collection_path_playlists))
+        pathlib.Path(os.path.dirname(sanitized_path)).mkdir(parents=True, exist_ok=True)
+        with open(path, 'r', encoding='utf8', errors='ignore') as playlist_file, \
+                open(sanitized_path + '.tmp', 'w', encoding='utf8') as sanitized_file:
+            information = ''
+            for number, line in enumerate(playlist_file, 1):
+                if line.startswith('#EXTINF'):
+                    sanitized_file.write(information)
+                    information = line
+                elif number in numbers_missing:
+                    information = ''
+                else:
+                    if line.strip().startswith(('./', '../')):
+                        line = self.__get_entry(directory, line.strip()) + '\n'
+                    sanitized_file.write(information + line)
+                    information = ''
+            sanitized_file.write(information)
+        os.replace(sanitized_path + '.tmp', sanitized_path)
+
+    def __get_entry(self, directory, line):
+        """Get the entry of a line of a playlist relative to the playlist, relative to the music collection instead.
+
+        :param str directory: full path of the directory of the playlist.
+        :param str line: the line of the playlist, starting with './' or '../'.
+        :return str entry: the entry, relative to the music collection, or absolute if outside of it.
+        """
+        entry = os.path.normpath(os.path.join(directory, line))
+        if entry.startswith(self.__collection_path_root):
+            entry = entry[len(self.__collection_path_root):]
+        return entry
+
+    def __show_summary(self):
+        """Show the summary of the sanitization, including the number of missing entries and of playlists to fix."""
+        self.__display.show_substep('Summary')
+        self.__display.show_validation('Entries in the playlists: {}'.format(self.__total_entries))
+        if self.__total_missing == 0:
+            self.__display.show_validation('All the songs of the playlists were found')
+        else:
+            self.__display.show_warning('Songs not found: {} in {} playlists'
+                                        .format(self.__total_missing, self.__total_playlists_missing))
+        if self.__sanitization_path is not None:
+            self.__display.show_validation('Sanitized playlists written in \'{}\''.format(self.__sanitization_path))
+        self.__display.show_record({'type': 'summary', 'entries': self.__total_entries,
+                                    'missing': self.__total_missing, 'playlists': self.__total_playlists_missing})
@@ -1,48 +1,62 @@
 #!/usr/bin/env python3
 import datetime
 import pathlib
-import tinytag
 import lib as audiouslib
 
 
 class Statistics(object):
-    def __init__(self, display, preferences, collection):
-        """Initialize the Statistics object internally."""
+    def __init__(self, display, preferences, collection, playlists=None):
+        """Initialize the Statistics object internally. The playlists can be shared with other objects, so that they
+        are parsed only once.
+        """
         self.__display = display
         self.__prefs = preferences
         self.__coll = collection
-        self.__play = audiouslib.playlists.Playlists(display, preferences)
+        self.__play = playlists or audiouslib.playlists.Playlists(display, preferences)
+        self.__meta = audiouslib.metadata.Metadata(display, preferences)
+        self.__collection_columns = audiouslib.columns.Columns()
+        self.__playlists_columns = audiouslib.columns.Columns()
 
         self.__collection_paths_music_categories = None
         self.__total_collection_songs, self.__total_collection_duration, self.__total_collection_albums = 0, 0, 0
         self.__total_playlists_songs, self.__total_playlists_duration, self.__total_playlists_albums = 0, 0, 0
+        self.__top_groups = 10
+        self.__byte_to_gigabyte = 1 / (1024 * 1024 * 1024)
 
     def init(self):
         """Initialize the Statistics object."""
         self.__collection_paths_music_categories = self.__prefs.get_collection_paths_music_categories()
         self.__coll.init()
         self.__play.init()
+        self.__meta.init()
 
-    def __report_song_duration(self, path):
-        """Report the duration of a FLAC song by checking the metadata. Also check that the path of the song is valid
-        and handle hidden files.
+    def __fill_songs_columns(self, paths, columns):
+        """Fill columns with the metadata of FLAC songs, which are read from the cache whenever the songs did not change
+        since the last run. Also check that the paths of the songs are valid with the music collection model and
+        handle hidden files. The metadata of all the valid songs are then extracted at once, in parallel, and each song
+        is parsed only once.
 
-        :param str path: path of the song.
-        :return float tag.duration: the duration of a song if the song is valid or 0 if not.
+        :param list paths: paths of the songs.
+        :param Columns columns: the columns to fill with the valid songs, in the same order as the paths.
         """
-        path_parsed = pathlib.Path(path)
-        if path_parsed.is_file() and path_parsed.suffix == '.flac':
-            song = path.rsplit('/', 1)[1]
-            if not song.startswith('.'):
-                tag = tinytag.TinyTag.get(path)
-                return tag.duration
+        valid_songs = []
+        for path in paths:
+            song = self.__coll.get_song(path)
+            if song is not None and pathlib.PurePath(path).suffix == '.flac':
+                song_name = path.rsplit('/', 1)[1]
+                if not song_name.startswith('.'):
+                    valid_songs.append(song)
+                else:
+                    self.__display.show_error('The following song could not be parsed and will be ignored: '
+                                              '\'{}\''.format(path))
             else:
-                self.__display.show_error('The following song could not be parsed and will be ignored: '
-                                          '\'{}\''.format(path))
-                return 0
-        else:
-            self.__display.show_error('The following song was not found: \'{}\''.format(path))
-            return 0
+                self.__display.show_error('The following song was not found: \'{}\''.format(path))
+
+        tags = self.__meta.get_many(valid_songs)
+        for song in valid_songs:
+            tag = tags.get(song.path)
+            if tag is not None:
+                columns.append(song, tag)
 
     def compute(self):
         """Compute the statistics of the music collection as well as of the playlists, including the albums that are
@@ -57,22 +71,27 @@ class Statistics(object):
         self.__fill_statistics_playlists()
         self.__show_statistics_playlists()
 
-        for category, path in self.__collection_paths_music_categories.items():
+        for category in self.__collection_paths_music_categories:
             self.__display.show_substep('Getting statistics for \'{}\''.format(category.title()))
             self.__display.show_warning('Depending on the quantity of songs, this operation might take a while...')
-            category_stats = self.__get_statistics_category(category, path)
+            category_stats = self.__get_statistics_category(category)
             self.__show_statistics_category(category_stats)
+            self.__display.show_record(dict(type='category', category=category, **category_stats))
+
+        self.__display.show_substep('Metadata of the music collection')
+        self.__show_statistics_metadata()
 
         self.__display.show_substep('Summary')
         self.__show_statistics_summary('music collection', self.__total_collection_albums,
                                        self.__total_collection_songs, self.__total_collection_duration)
-        print()
+        self.__display.show_newline()
         self.__show_statistics_summary('playlists', self.__total_playlists_albums,
                                        self.__total_playlists_songs, self.__total_playlists_duration)
+        self.__meta.close()
 
     def __fill_statistics_playlists(self):
-        """Fill the statistics of the playlists. Show the total of available playlists. Get the duration of all songs
-        and increment accordingly the total duration of the playlists.
+        """Fill the statistics of the playlists. Show the total of available playlists. Get the metadata of all songs
+        at once and compute the total duration of the playlists.
         """
         self.__play.show_playlists_total()
         self.__total_playlists_albums = len(self.__play.get_albums())
@@ -80,8 +99,8 @@ class Statistics(object):
         playlists_songs = self.__play.get_songs()
 
         self.__total_playlists_songs += len(playlists_songs)
-        for song in playlists_songs:
-            self.__total_playlists_duration += self.__report_song_duration(song)
+        self.__fill_songs_columns(playlists_songs, self.__playlists_columns)
+        self.__total_playlists_duration = self.__playlists_columns.total('duration')
 
     def __show_statistics_playlists(self):
         """Show the statistics of the playlists, including the number of songs and the total duration."""
@@ -90,29 +109,34 @@ class Statistics(object):
                                    '1 song was found in the playlists', 'No songs were found in the playlists')
         self.__display.show_validation('Total duration of the playlists: {}'
                                        .format(self.__convert_duration(self.__total_playlists_duration)))
+        self.__display.show_record({'type': 'playlists', 'songs': self.__total_playlists_songs,
+                                    'duration': self.__total_playlists_duration})
 
-    def __get_statistics_category(self, category, path):
+    def __get_statistics_category(self, category):
         """Get the statistics of a music collection category. Initialize totals for overall duration, the albums, and
-        the songs. Get both the songs and the albums of a music collection category. Increment accordingly the totals
-        and generate a dictionary containing those stats.
+        the songs. Get both the songs and the albums of a music collection category. Get the metadata of all songs at
+        once, each song being parsed only once, and append them to the columns of the music collection. Increment
+        accordingly the totals of the category and of the music collection and generate a dictionary containing those
+        stats.
 
         :param str category: the music collection category name.
-        :param str path: the path where the music collection category is located.
         :return dict category_stats: statistics of the music collection category.
         """
-        total_duration_category, total_category_songs, total_category_albums = 0, 0, 0
+        total_category_songs, total_category_albums = 0, 0
 
-        category_songs = self.__coll.get_category_songs(category, path)
-        category_albums = self.__coll.get_category_albums(category_songs)
+        self.__coll.show_category_parsing(category)
+        category_songs = self.__coll.get_category_songs(category)
+        category_albums = self.__coll.get_category_albums(category)
 
         total_category_songs += len(category_songs)
         total_category_albums += len(category_albums)
         self.__total_collection_songs += total_category_songs
         self.__total_collection_albums += total_category_albums
 
-        for song in category_songs:
-            total_duration_category += self.__report_song_duration(song)
-            self.__total_collection_duration += self.__report_song_duration(song)
+        start = len(self.__collection_columns)
+        self.__fill_songs_columns([song.path for song in category_songs], self.__collection_columns)
+        total_duration_category = self.__collection_columns.total('duration', start)
+        self.__total_collection_duration += total_duration_category
 
         category_stats = {'duration': total_duration_category, 'albums': total_category_albums,
                           'songs': total_category_songs}
@@ -131,6 +155,53 @@ class Statistics(object):
                                    '1 song was found in this category', 'No songs were found in this category')
         self.__display.show_validation('Total duration: {}'.format(duration))
 
+    def __show_statistics_metadata(self):
+        """Show the statistics computed from the metadata of the songs of the music collection: the duration by decade,
+        the share of hi-res and CD quality songs, the sample rates, the most common genres and the artists taking the
+        most space on the disk.
+        """
+        columns = self.__collection_columns
+        total = len(columns)
+        if total == 0:
+            self.__display.show_warning('No metadata were found in the music collection')
+            return
+
+        decades = columns.aggregate('duration', 'decade')
+        self.__display.show_validation('Duration by decade:')
+        for decade in sorted(decades):
+            songs, duration = decades[decade]
+            self.__display.show_validation('  {}: {} songs, {}'
+                                           .format(decade, songs, self.__convert_duration(duration)))
+
+        qualities = columns.histogram('quality')
+        self.__display.show_validation('Quality: {}'.format(', '.join('{:,.2f}% {}'.format(songs / total * 100.,
+                                                                                           quality)
+                                                                      for quality, songs in qualities.items())))
+
+        samplerates = columns.histogram('samplerate')
+        self.__display.show_validation('Sample rates: {}'.format(', '.join('{} ({} songs)'.format(samplerate, songs)
+                                                                           for samplerate, songs
+                                                                           in samplerates.items())))
+
+        genres = columns.histogram('genre')
+        self.__display.show_validation('Most common genres:')
+        for genre, songs in list(genres.items())[:self.__top_groups]:
+            self.__display.show_validation('  {}: {} songs ({:,.2f}%)'.format(genre, songs, songs / total * 100.))
+
+        artists = columns.aggregate('size', 'artist')
+        self.__display.show_validation('Largest artists:')
+        for artist, (songs, size) in list(artists.items())[:self.__top_groups]:
+            self.__display.show_validation('  {}: {:,.2f} GB ({} songs)'.format(artist, size * self.__byte_to_gigabyte,
+                                                                               songs))
+
+        self.__display.show_record({'type': 'aggregate', 'name': 'decades', 'groups': {
+            decade: {'songs': songs, 'duration': duration} for decade, (songs, duration) in decades.items()}})
+        self.__display.show_record({'type': 'histogram', 'name': 'qualities', 'groups': qualities})
+        self.__display.show_record({'type': 'histogram', 'name': 'samplerates', 'groups': samplerates})
+        self.__display.show_record({'type': 'histogram', 'name': 'genres', 'groups': genres})
+        self.__display.show_record({'type': 'aggregate', 'name': 'artists', 'groups': {
+            artist: {'songs': songs, 'size': size} for artist, (songs, size) in artists.items()}})
+
     def __show_statistics_summary(self, location, albums, songs, duration):
         """Show the summary of statistics for a location (e.g. playlists or music collection), including the number of
         albums as well as the number of songs and the total duration.
@@ -151,6 +222,8 @@ class Statistics(object):
                                    '1 song is in the {}'.format(location), '0 songs are in the {}'.format(location))
 
         # Showing the total duration in the location
+        self.__display.show_record({'type': 'summary', 'location': location, 'albums': albums, 'songs': songs,
+                                    'duration': float(duration)})
         duration = self.__convert_duration(float(duration))
         self.__display.show_validation('Total duration of the {}: {}'.format(location, duration))
 
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import shutil
+import subprocess
+import sys
+import lib as audiouslib
+
+
+class Transcoder(object):
+    def __init__(self, display, preferences):
+        """Initialize the Transcoder object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__quality = 0
+        self.__settings = ['-codec:a', 'libmp3lame', '-qscale:a', str(self.__quality), '-map_metadata', '0',
+                           '-id3v2_version', '3']
+        self.__bitrates = [245000, 225000, 190000, 175000, 165000, 130000, 115000, 100000, 85000, 65000]
+
+    def init(self):
+        """Initialize the Transcoder object. Check that FFmpeg is available. If not, generate an error and leave the
+        program.
+        """
+        if shutil.which('ffmpeg') is None:
+            self.__display.show_error('FFmpeg could not be found. Please install FFmpeg and try again.')
+            sys.exit(1)
+
+    def get_settings(self):
+        """Get the FFmpeg settings used for the conversion from FLAC to MP3.
+
+        :return str settings: the settings, as written on the command line.
+        """
+        return ' '.join(self.__settings)
+
+    def get_bitrate(self):
+        """Get the average bitrate produced by the LAME VBR quality used for the conversion.
+
+        :return int bitrate: the average bitrate in bits per second.
+        """
+        return self.__bitrates[self.__quality]
+
+    def get_command(self, collection_path_song, exportation_path_song):
+        """Get the FFmpeg command converting a song from FLAC to MP3, as a list of arguments so that no shell is
+        involved.
+
+        :param str collection_path_song: full path of the song in FLAC in the music collection.
+        :param str exportation_path_song: full path of the song in MP3 in the exportation directory.
+        :return list command: the FFmpeg command.
+        """
+        return ['ffmpeg', '-v', 'quiet', '-y', '-i', collection_path_song] + self.__settings + [exportation_path_song]
+
+    def encode(self, collection_path_song, exportation_path_song):
+        """Run FFmpeg to convert a song. Several songs can be converted at the same time from different threads.
+
+        :param str collection_path_song: full path of the song in FLAC in the music collection.
+        :param str exportation_path_song: full path of the song in MP3 (e.g. in a temporary directory).
+        :return int returncode: the exit status of FFmpeg.
+        """
+        command = self.get_command(collection_path_song, exportation_path_song)
+        with audiouslib.profiler.profiler.phase('ffmpeg'):
+            return subprocess.run(command, stdin=subprocess.DEVNULL).returncode
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+import concurrent.futures
+import os
+import shutil
+import subprocess
+import sys
+import lib as audiouslib
+
+
+def decode(command):
+    """Decode a song with an external decoder and check its exit status. Both decoders exit with an error status when
+    the song is corrupted, so that the warnings that they may write (e.g. about an unusual but valid song) are ignored.
+
+    :param list command: the command decoding the song.
+    :return tuple verdict: True if the song was decoded successfully, False if it is corrupted, or None if the decoder
+     could not be started; along with the first error message, if any.
+    """
+    try:
+        process = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        return None, str(e)
+    if process.returncode != 0:
+        errors = process.stderr.decode('utf8', errors='replace').strip()
+        return False, errors.splitlines()[0] if errors else 'exit status {}'.format(process.returncode)
+    return True, None
+
+
+class Verifier(object):
+    def __init__(self, display, preferences, collection):
+        """Initialize the Verifier object internally."""
+        self.__display = display
+        self.__prefs = preferences
+        self.__coll = collection
+        self.__progress = audiouslib.progress.Progress(display, preferences, 'Verified', ('valid', 'corrupted'),
+                                                       ('unverified',))
+
+        self.__collection_paths_music_categories = None
+        self.__flac = None
+        self.__ffmpeg = None
+        self.__workers = None
+        self.__cache_name = 'verifications.db'
+        self.__cache_version = 1
+        self.__cache_connection = None
+        self.__cache_commit_every = 100
+        self.__total_songs = 0
+        self.__total_cached = 0
+        self.__total_corrupted = 0
+        self.__total_unverified = 0
+
+    def init(self):
+        """Initialize the Verifier object. Find the decoders: the reference FLAC decoder checks the MD5 signature of the
+        audio data stored in each FLAC song, and FFmpeg decodes the other songs, or all of them if the FLAC decoder is
+        not available. If none is available, generate an error and leave the program; if only the FLAC decoder is
+        available, the other songs cannot be verified. Also open the cache of the verdicts.
+        """
+        self.__coll.init()
+        self.__collection_paths_music_categories = self.__prefs.get_collection_paths_music_categories()
+        self.__workers = self.__prefs.get_performance_workers()
+        self.__flac = shutil.which('flac')
+        self.__ffmpeg = shutil.which('ffmpeg')
+        if self.__flac is None and self.__ffmpeg is None:
+            self.__display.show_error('Neither FLAC nor FFmpeg could be found. Please install one of them and try '
+                                      'again.')
+            sys.exit(1)
+        if self.__ffmpeg is None:
+            self.__display.show_warning('FFmpeg could not be found: only the FLAC songs will be verified.')
+
+        self.__cache_connection = audiouslib.cache.open_cache(
+            self.__prefs, self.__cache_name, self.__cache_version,
+            {'verdicts': '(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, valid INTEGER, message TEXT)'})
+
+    def verify(self):
+        """Verify that all the songs of the music collection can be decoded, category by category. The songs whose
+        verdict is in the cache and which did not change since then are not decoded again. The other songs are decoded
+        by several decoders running at the same time, one per worker set in the Preferences. Finally, show a summary.
+        """
+        try:
+            for category in self.__collection_paths_music_categories:
+                self.__display.show_substep('Verifying \'{}\''.format(category.title()))
+                self.__display.show_warning('Depending on the quantity of songs, this operation might take a while...')
+                self.__verify_songs(self.__coll.get_category_songs(category))
+            self.__show_summary()
+        finally:
+            self.__cache_connection.commit()
+            self.__cache_connection.close()
+
+    def __verify_songs(self, songs):
+        """Verify a list of songs. Report the corrupted ones as soon as they are found, and the progress at a regular
+        interval. The status of each song is checked again on the disk, as a song modified in place does not change the
+        last modification time of its directory; this is cheap compared to decoding the song. The songs that no
+        available decoder can decode, or whose decoder could not be started, are reported as unverified, and their
+        verdict is not cached, so that they are verified again next time.
+
+        :param list songs: the songs, as found in the music collection.
+        """
+        self.__total_songs += len(songs)
+        misses, cached = [], 0
+        for song in songs:
+            try:
+                with audiouslib.profiler.profiler.phase('stat'):
+                    stat = os.stat(song.path)
+            except OSError:
+                self.__display.show_error('The following song was not found: \'{}\''.format(song.path))
+                continue
+            song = audiouslib.collection.Song(song.path, stat.st_size, stat.st_mtime_ns)
+            row = self.__cache_connection.execute('SELECT size, mtime, valid, message FROM verdicts WHERE path = ?',
+                                                  (song.path,)).fetchone()
+            if row is not None and row[0] == song.size and row[1] == song.mtime:
+                cached += 1
+                if not row[2]:
+                    self.__show_corrupted(song, row[3])
+            elif self.__get_command(song) is None:
+                self.__show_unverified(song, 'FFmpeg is not installed')
+            else:
+                misses.append(song)
+        self.__display.show_validation('{} songs to verify, {} already verified'
+                                       .format(len(misses), cached))
+        self.__total_cached += cached
+
+        self.__progress.start(len(misses), sum(song.size for song in misses))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            verdicts = executor.map(decode, map(self.__get_command, misses))
+            for number, (song, (valid, message)) in enumerate(zip(misses, verdicts), 1):
+                if valid is None:
+                    self.__show_unverified(song, message)
+                    self.__progress.update('unverified', 0)
+                    continue
+                self.__cache_connection.execute('INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)',
+                                                (song.path, song.size, song.mtime, valid, message))
+                if not valid:
+                    self.__show_corrupted(song, message)
+                if number % self.__cache_commit_every == 0:
+                    self.__cache_connection.commit()
+                self.__progress.update('valid' if valid else 'corrupted', song.size)
+        if misses:
+            self.__progress.finish()
+
+    def __get_command(self, song):
+        """Get the command decoding a song. A FLAC song is tested by the reference FLAC decoder if available, which also
+        checks its MD5 signature; otherwise the song is decoded by FFmpeg, which stops at the first error.
+
+        :param Song song: the song, as found in the music collection.
+        :return list command: the command decoding the song, or None if no available decoder can decode it.
+        """
+        if self.__flac is not None and song.path.endswith('.flac'):
+            return [self.__flac, '--test', '--silent', song.path]
+        if self.__ffmpeg is not None:
+            return [self.__ffmpeg, '-v', 'error', '-xerror', '-i', song.path, '-f', 'null', '-']
+        return None
+
+    def __show_corrupted(self, song, message):
+        """Show a song that could not be decoded.
+
+        :param Song song: the song, as found in the music collection.
+        :param str message: the error given by the decoder.
+        """
+        self.__total_corrupted += 1
+        self.__display.show_error('The following song is corrupted: \'{}\' ({})'.format(song.path, message))
+        self.__display.show_record({'type': 'corrupted', 'path': song.path, 'message': message})
+
+    def __show_unverified(self, song, message):
+        """Show a song that could not be verified.
+
+        :param Song song: the song, as found in the music collection.
+        :param str message: the reason why the song could not be verified.
+        """
+        self.__total_unverified += 1
+        self.__display.show_warning('The following song could not be verified: \'{}\' ({})'.format(song.path, message))
+        self.__display.show_record({'type': 'unverified', 'path': song.path, 'message': message})
+
+    def __show_summary(self):
+        """Show the summary of the verification, including the number of songs verified and of corrupted songs."""
+        self.__display.show_substep('Summary')
+        self.__display.show_validation('Songs in the music collection: {} ({} already verified)'
+                                       .format(self.__total_songs, self.__total_cached))
+        if self.__total_corrupted == 0:
+            self.__display.show_validation('No corrupted songs were found')
+        else:
+            self.__display.show_triple(self.__display.show_error, self.__total_corrupted,
+                                       '{} songs are corrupted'.format(self.__total_corrupted),
+                                       '1 song is corrupted', '')
+        if self.__total_unverified > 0:
+            self.__display.show_triple(self.__display.show_warning, self.__total_unverified,
+                                       '{} songs could not be verified'.format(self.__total_unverified),
+                                       '1 song could not be verified', '')
+        self.__display.show_record({'type': 'summary', 'songs': self.__total_songs, 'cached': self.__total_cached,
+                                    'corrupted': self.__total_corrupted, 'unverified': self.__total_unverified})
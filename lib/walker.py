@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import lib as audiouslib
+
+
+Entry = collections.namedtuple('Entry', ['path', 'size', 'mtime'])
+
+
+class Walker(object):
+    def __init__(self, display, preferences):
+        """Initialize the Walker object internally."""
+        self.__display = display
+        self.__prefs = preferences
+
+        self.__threads = None
+        self.__threads_per_worker = 4
+        self.__threads_max = 32
+        self.__snapshot_name = 'snapshot.db'
+        self.__snapshot_version = 1
+        self.__snapshots = {}
+
+    def init(self):
+        """Initialize the Walker object. Listing directories is mostly waiting for the disk or the network, so several
+        threads are used per worker set in the Preferences, within a reasonable limit.
+        """
+        workers = self.__prefs.get_performance_workers()
+        self.__threads = min(self.__threads_max, workers * self.__threads_per_worker)
+
+    def walk(self, path, extensions):
+        """Walk recursively a directory and get all the files with the given extensions. The directories of a same
+        level are listed concurrently by a bounded pool of threads. A snapshot of the previous walk is used to list
+        again only the directories whose last modification time changed; the listing of the other directories is
+        reused from the snapshot. The files are returned in the same order as a top-down walk, along with their size
+        and last modification time found during the listing, so that they do not need to be checked again later.
+
+        :param str path: the path of the directory to walk.
+        :param tuple extensions: the extensions of the files to select (e.g. ('.flac', '.mp3')).
+        :return list entries: the files found in the directory and its subdirectories.
+        """
+        key = ' '.join(extensions)
+        snapshot = self.__get_snapshot(key)
+        listings = {}
+        level = [path]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.__threads) as executor:
+            while level:
+                next_level = []
+                listings_level = executor.map(self.__list, level, itertools.repeat(extensions),
+                                              itertools.repeat(snapshot))
+                for directory, listing in zip(level, listings_level):
+                    listings[directory] = listing
+                    next_level.extend(listing[2])
+                level = next_level
+
+        self.__save_snapshot(key, path, snapshot, listings)
+
+        entries = []
+        stack = [path]
+        while stack:
+            mtime, files, directories = listings[stack.pop()]
+            entries.extend(files)
+            stack.extend(reversed(directories))
+        return entries
+
+    def __list(self, path, extensions, snapshot):
+        """List a directory, unless it did not change since the snapshot was taken. Select the files with a suffix check
+        on their names and get their status. Symbolic links to directories are not followed. Directories that cannot
+        be listed are ignored.
+
+        :param str path: the path of the directory to list.
+        :param tuple extensions: the extensions of the files to select.
+        :param dict snapshot: the listings of the previous walk, indexed by directory.
+        :return tuple listing: the last modification time of the directory, its selected files and its subdirectories.
+        """
+        try:
+            with audiouslib.profiler.profiler.phase('stat'):
+                mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, [], []
+        listing = snapshot.get(path)
+        if listing is not None and listing[0] == mtime:
+            return listing
+
+        with audiouslib.profiler.profiler.phase('walk'):
+            return mtime, *self.__scan(path, extensions)
+
+    def __scan(self, path, extensions):
+        """Scan a directory, select the files with a suffix check on their names and get their status.
+
+        :param str path: the path of the directory to scan.
+        :param tuple extensions: the extensions of the files to select.
+        :return tuple listing: the selected files and the subdirectories of the directory.
+        """
+        files, directories = [], []
+        try:
+            with os.scandir(path) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                directories.append(entry.path)
+                        elif entry.name.endswith(extensions):
+                            stat = entry.stat()
+                            files.append(Entry(entry.path, stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        audiouslib.profiler.profiler.add('stat', len(files))
+        return files, directories
+
+    def __open_snapshot(self):
+        """Open the snapshot stored in the cache directory.
+
+        :return sqlite3.Connection connection: the connection to the snapshot.
+        """
+        return audiouslib.cache.open_cache(
+            self.__prefs, self.__snapshot_name, self.__snapshot_version,
+            {'directories': '(path TEXT, extensions TEXT, mtime INTEGER, files TEXT, directories TEXT, '
+                            'PRIMARY KEY (path, extensions))'})
+
+    def __get_snapshot(self, key):
+        """Get the listings of the previous walks made with the same extensions. They are loaded from the disk only
+        once, and then kept up to date in memory by the next walks.
+
+        :param str key: the extensions of the files that were selected.
+        :return dict snapshot: the listings of the previous walks, indexed by directory.
+        """
+        if key in self.__snapshots:
+            return self.__snapshots[key]
+
+        snapshot = {}
+        connection = self.__open_snapshot()
+        for path, mtime, files, directories in connection.execute('SELECT path, mtime, files, directories FROM '
+                                                                  'directories WHERE extensions = ?', (key,)):
+            snapshot[path] = (mtime, [Entry(*file) for file in json.loads(files)], json.loads(directories))
+        connection.close()
+        self.__snapshots[key] = snapshot
+        return snapshot
+
+    def __save_snapshot(self, key, path, snapshot, listings):
+        """Save the listings of the directories that changed since the previous walk and forget the directories that
+        do not exist anymore, both on the disk and in memory. Only the directories inside the walked directory are
+        considered, not the ones whose path merely starts with the same characters (e.g. 'Artists2' for 'Artists').
+
+        :param str key: the extensions of the files that were selected.
+        :param str path: the path of the directory that was walked.
+        :param dict snapshot: the listings of the previous walks, indexed by directory.
+        :param dict listings: the listings of the current walk, indexed by directory.
+        """
+        prefix = path.rstrip(os.sep) + os.sep
+        removed = [directory for directory in snapshot
+                   if (directory == path or directory.startswith(prefix)) and directory not in listings]
+        changed = [directory for directory, listing in listings.items()
+                   if listing[0] is not None and snapshot.get(directory) is not listing]
+        if not removed and not changed:
+            return
+
+        connection = self.__open_snapshot()
+        with connection:
+            connection.executemany('DELETE FROM directories WHERE path = ? AND extensions = ?',
+                                   [(directory, key) for directory in removed])
+            connection.executemany('INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?)',
+                                   [(directory, key, listings[directory][0], json.dumps(listings[directory][1]),
+                                     json.dumps(listings[directory][2])) for directory in changed])
+        connection.close()
+
+        for directory in removed:
+            del snapshot[directory]
+        for directory in changed:
+            snapshot[directory] = listings[directory]
+
+    def clear(self):
+        """Clear the snapshot, so that the next walks list again all the directories."""
+        connection = self.__open_snapshot()
+        with connection:
+            connection.execute('DELETE FROM directories')
+        connection.close()
+        self.__snapshots = {}
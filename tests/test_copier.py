@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import lib as audiouslib  # noqa: E402
+
+
+class Preferences(object):
+    def __init__(self, hardlinks):
+        """Initialize the Preferences stub with the only setting read by the Copier."""
+        self.__hardlinks = hardlinks
+
+    def get_exportation_hardlinks(self):
+        """Get whether songs can be exported as hard links."""
+        return self.__hardlinks
+
+
+class TestCopier(unittest.TestCase):
+    def setUp(self):
+        """Create a song in a temporary directory."""
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__source = os.path.join(self.__directory.name, 'song.flac')
+        self.__destination = os.path.join(self.__directory.name, 'copy.flac')
+        with open(self.__source, 'wb') as source_file:
+            source_file.write(b'fLaC' + os.urandom(4096))
+        with open(self.__source, 'rb') as source_file:
+            self.__data = source_file.read()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.__directory.cleanup()
+
+    def __get_copier(self, hardlinks):
+        """Get an initialized Copier.
+
+        :param bool hardlinks: True if songs can be exported as hard links.
+        :return Copier copier: the Copier.
+        """
+        copier = audiouslib.copier.Copier(None, Preferences(hardlinks))
+        copier.init()
+        return copier
+
+    def test_copy(self):
+        """A song is copied with its data and its last modification time."""
+        self.__get_copier(False).copy(self.__source, self.__destination)
+        with open(self.__destination, 'rb') as destination_file:
+            self.assertEqual(destination_file.read(), self.__data)
+        self.assertEqual(os.stat(self.__destination).st_mtime_ns, os.stat(self.__source).st_mtime_ns)
+        self.assertFalse(os.path.exists(self.__destination + '.tmp'))
+
+    def test_copy_onto_hard_link_to_source(self):
+        """A previous copy exported as a hard link to the song is refused, and the song is left untouched."""
+        os.link(self.__source, self.__destination)
+        with self.assertRaises(shutil.SameFileError):
+            self.__get_copier(False).copy(self.__source, self.__destination)
+        with open(self.__source, 'rb') as source_file:
+            self.assertEqual(source_file.read(), self.__data)
+
+    def test_copy_onto_hard_link_to_other_file(self):
+        """A previous copy that is a hard link to another file is replaced, not written through."""
+        other = os.path.join(self.__directory.name, 'other.flac')
+        with open(other, 'wb') as other_file:
+            other_file.write(b'other')
+        os.link(other, self.__destination)
+        self.__get_copier(False).copy(self.__source, self.__destination)
+        with open(other, 'rb') as other_file:
+            self.assertEqual(other_file.read(), b'other')
+        with open(self.__destination, 'rb') as destination_file:
+            self.assertEqual(destination_file.read(), self.__data)
+
+    def test_link_then_copy(self):
+        """A song exported as a hard link and then copied once hard links are disabled is left untouched."""
+        self.__get_copier(True).copy(self.__source, self.__destination)
+        self.assertTrue(os.path.samefile(self.__source, self.__destination))
+        with self.assertRaises(shutil.SameFileError):
+            self.__get_copier(False).copy(self.__source, self.__destination)
+        self.assertEqual(os.path.getsize(self.__source), len(self.__data))
+
+
+if __name__ == '__main__':
+    unittest.main()
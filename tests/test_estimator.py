@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import lib as audiouslib  # noqa: E402
+
+
+class Preferences(object):
+    def __init__(self, exportation_format, cache_path):
+        """Initialize the Preferences stub with the only settings read by the Estimator."""
+        self.__exportation_format = exportation_format
+        self.__cache_path = cache_path
+
+    def get_exportation_format(self):
+        """Get the exportation format."""
+        return self.__exportation_format
+
+    def get_performance_encoders(self):
+        """Get the number of encoders."""
+        return 2
+
+    def get_cache_path(self):
+        """Get the path of the caches."""
+        return self.__cache_path
+
+
+class TestEstimator(unittest.TestCase):
+    def setUp(self):
+        """Create a temporary cache directory."""
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        self.__directory.cleanup()
+
+    def __get_estimator(self, exportation_format):
+        """Get an initialized Estimator.
+
+        :param str exportation_format: the exportation format ('flac' or 'mp3').
+        :return Estimator estimator: the Estimator.
+        """
+        estimator = audiouslib.estimator.Estimator(None, Preferences(exportation_format, self.__directory.name))
+        estimator.init(320000 if exportation_format == 'mp3' else None)
+        return estimator
+
+    def test_record_copy_speed(self):
+        """The copy speed measured during an exportation is used by the next estimates."""
+        self.__get_estimator('flac').record(100 * 1024 * 1024, 0., 10.)
+        self.assertAlmostEqual(self.__get_estimator('flac').get_time(100 * 1024 * 1024, 0.), 10.)
+
+    def test_record_skipped_exportation(self):
+        """A long exportation where every song was skipped does not record a speed of 0."""
+        for exportation_format in ('flac', 'mp3'):
+            self.__get_estimator(exportation_format).record(0, 0., 10.)
+            self.assertGreater(self.__get_estimator(exportation_format).get_time(1024 * 1024, 60.), 0.)
+
+    def test_zero_speeds(self):
+        """Speeds of 0 recorded by a previous version are ignored instead of dividing by zero."""
+        with open(os.path.join(self.__directory.name, 'estimates.json'), 'w') as rates_file:
+            json.dump({'encoding_speed': 0., 'copy_speed': 0.}, rates_file)
+        for exportation_format in ('flac', 'mp3'):
+            self.assertGreater(self.__get_estimator(exportation_format).get_time(1024 * 1024, 60.), 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
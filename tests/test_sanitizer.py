@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import lib as audiouslib  # noqa: E402
+
+
+class Preferences(object):
+    def __init__(self, directory):
+        """Initialize the Preferences stub with the only settings read by the Sanitizer and the Playlists."""
+        self.__directory = directory
+
+    def get_collection_path_root(self):
+        """Get the root path of the music collection."""
+        return os.path.join(self.__directory, 'collection', '')
+
+    def get_collection_path_playlists(self):
+        """Get the path of the playlists."""
+        return os.path.join(self.__directory, 'collection', 'Playlists')
+
+    def get_sanitization_path(self):
+        """Get the path of the sanitized playlists."""
+        return os.path.join(self.__directory, 'sanitized', '')
+
+    def get_performance_workers(self):
+        """Get the number of workers."""
+        return 1
+
+    def get_cache_path(self):
+        """Get the path of the caches."""
+        return os.path.join(self.__directory, 'cache')
+
+
+class Collection(object):
+    def __init__(self, root):
+        """Initialize the Collection stub, whose songs are the files of the music collection."""
+        self.__root = root
+
+    def init(self):
+        """Initialize the Collection stub."""
+
+    def get_song(self, path):
+        """Get a song of the music collection.
+
+        :param str path: full path of the song.
+        :return str song: the path of the song, or None if it is not in the music collection.
+        """
+        return path if path.startswith(self.__root) and os.path.isfile(path) else None
+
+
+class TestSanitizer(unittest.TestCase):
+    def setUp(self):
+        """Create a music collection with playlists of the same name in different directories."""
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__prefs = Preferences(self.__directory.name)
+        self.__root = self.__prefs.get_collection_path_root()
+        for directory in ('cache', 'sanitized', 'collection/Playlists/Rock', 'collection/Artist/Album'):
+            os.makedirs(os.path.join(self.__directory.name, directory))
+        with open(os.path.join(self.__root, 'Artist/Album/01 - Song.flac'), 'wb') as song_file:
+            song_file.write(b'fLaC')
+        self.__write('Playlists/Best.m3u', 'Artist/Album/01 - Song.flac\nArtist/Album/02 - Song.flac\n')
+        self.__write('Playlists/Rock/Best.m3u', '../../Artist/Album/01 - Song.flac\n')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.__directory.cleanup()
+
+    def __write(self, path, content):
+        """Write a file in the music collection.
+
+        :param str path: the path of the file, relative to the music collection.
+        :param str content: the content of the file.
+        """
+        with open(os.path.join(self.__root, path), 'w', encoding='utf8') as playlist_file:
+            playlist_file.write(content)
+
+    def __read(self, path):
+        """Read a sanitized playlist.
+
+        :param str path: the path of the playlist, relative to the directory of the sanitized playlists.
+        :return str content: the content of the playlist.
+        """
+        with open(os.path.join(self.__prefs.get_sanitization_path(), path), encoding='utf8') as playlist_file:
+            return playlist_file.read()
+
+    def test_sanitize_output(self):
+        """The sanitized playlists keep their directories, and their entries still resolve from the new location."""
+        display = audiouslib.display.Display()
+        display.set_quiet(True)
+        sanitizer = audiouslib.sanitizer.Sanitizer(display, self.__prefs, Collection(self.__root),
+                                                   audiouslib.playlists.Playlists(display, self.__prefs))
+        sanitizer.init()
+        sanitizer.sanitize()
+        self.assertEqual(self.__read('Best.m3u'), 'Artist/Album/01 - Song.flac\n')
+        self.assertEqual(self.__read('Rock/Best.m3u'), 'Artist/Album/01 - Song.flac\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+import pathlib
+import sys
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import lib as audiouslib  # noqa: E402
+
+
+class TestDecode(unittest.TestCase):
+    def test_valid(self):
+        """A song decoded successfully is valid, even if the decoder wrote a warning."""
+        command = [sys.executable, '-c', 'import sys; sys.stderr.write("WARNING: unusual block\\n")']
+        self.assertEqual(audiouslib.verifier.decode(command), (True, None))
+
+    def test_corrupted(self):
+        """A song is corrupted when the decoder exits with an error status, along with its first error message."""
+        command = [sys.executable, '-c', 'import sys; sys.stderr.write("ERROR: MD5 mismatch\\nmore\\n"); sys.exit(1)']
+        self.assertEqual(audiouslib.verifier.decode(command), (False, 'ERROR: MD5 mismatch'))
+
+    def test_decoder_not_started(self):
+        """A song whose decoder could not be started is neither valid nor corrupted."""
+        valid, message = audiouslib.verifier.decode(['/nonexistent/flac', '--test'])
+        self.assertIsNone(valid)
+        self.assertTrue(message)
+
+
+if __name__ == '__main__':
+    unittest.main()
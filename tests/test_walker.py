@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import lib as audiouslib  # noqa: E402
+
+
+class Preferences(object):
+    def __init__(self, cache_path):
+        """Initialize the Preferences stub with the only settings read by the Walker."""
+        self.__cache_path = cache_path
+
+    def get_performance_workers(self):
+        """Get the number of workers."""
+        return 1
+
+    def get_cache_path(self):
+        """Get the path of the caches."""
+        return self.__cache_path
+
+
+class TestWalker(unittest.TestCase):
+    def setUp(self):
+        """Create a music collection and a cache directory in a temporary directory."""
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__root = os.path.join(self.__directory.name, 'collection')
+        self.__cache = os.path.join(self.__directory.name, 'cache')
+        os.mkdir(self.__cache)
+        for album in ('Artists/Artist/Album', 'Artists2/Artist/Album'):
+            os.makedirs(os.path.join(self.__root, album))
+            self.__create(os.path.join(album, '01 - Song.flac'))
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.__directory.cleanup()
+
+    def __create(self, path):
+        """Create a song in the music collection.
+
+        :param str path: the path of the song, relative to the music collection.
+        """
+        with open(os.path.join(self.__root, path), 'wb') as song_file:
+            song_file.write(b'fLaC')
+
+    def __get_walker(self):
+        """Get an initialized Walker.
+
+        :return Walker walker: the Walker.
+        """
+        walker = audiouslib.walker.Walker(None, Preferences(self.__cache))
+        walker.init()
+        return walker
+
+    def __walk(self, walker, category):
+        """Walk a category of the music collection.
+
+        :param Walker walker: the Walker.
+        :param str category: the name of the category.
+        :return list paths: the paths of the songs found, relative to the music collection.
+        """
+        return [os.path.relpath(entry.path, self.__root)
+                for entry in walker.walk(os.path.join(self.__root, category), ('.flac', '.mp3'))]
+
+    def __get_snapshot_directories(self):
+        """Get the directories saved in the snapshot.
+
+        :return set directories: the paths of the directories, relative to the music collection.
+        """
+        connection = sqlite3.connect(os.path.join(self.__cache, 'snapshot.db'))
+        directories = {os.path.relpath(path, self.__root)
+                       for path, in connection.execute('SELECT path FROM directories')}
+        connection.close()
+        return directories
+
+    def test_walk(self):
+        """All the songs of a category are found, and only them."""
+        self.assertEqual(self.__walk(self.__get_walker(), 'Artists'), ['Artists/Artist/Album/01 - Song.flac'])
+
+    def test_sibling_category_kept_in_snapshot(self):
+        """Walking a category does not forget a category whose name starts with the same characters."""
+        self.__walk(self.__get_walker(), 'Artists2')
+        self.__walk(self.__get_walker(), 'Artists')
+        self.assertIn('Artists2/Artist/Album', self.__get_snapshot_directories())
+        self.assertIn('Artists/Artist/Album', self.__get_snapshot_directories())
+
+    def test_changed_directory(self):
+        """A song added to a directory is found by the next walk, with the same Walker or a new one."""
+        walker = self.__get_walker()
+        self.__walk(walker, 'Artists')
+        album = os.path.join(self.__root, 'Artists/Artist/Album')
+        mtime = os.stat(album).st_mtime_ns
+        self.__create('Artists/Artist/Album/02 - Song.flac')
+        os.utime(album, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+        expected = ['Artists/Artist/Album/01 - Song.flac', 'Artists/Artist/Album/02 - Song.flac']
+        self.assertEqual(sorted(self.__walk(walker, 'Artists')), expected)
+        self.assertEqual(sorted(self.__walk(self.__get_walker(), 'Artists')), expected)
+
+    def test_removed_directory(self):
+        """A directory that does not exist anymore is forgotten by the snapshot."""
+        self.__walk(self.__get_walker(), 'Artists')
+        os.remove(os.path.join(self.__root, 'Artists/Artist/Album/01 - Song.flac'))
+        os.rmdir(os.path.join(self.__root, 'Artists/Artist/Album'))
+        self.assertEqual(self.__walk(self.__get_walker(), 'Artists'), [])
+        self.assertNotIn('Artists/Artist/Album', self.__get_snapshot_directories())
+
+
+if __name__ == '__main__':
+    unittest.main()